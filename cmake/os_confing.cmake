@@ -209,3 +209,9 @@ set(ENABLE_USER_BIN_OUTPUT ON)
 # 自动配置clangd
 option(ENABLE_AUTO_CFG_CLANG BOOL)
 set(ENABLE_AUTO_CFG_CLANG ON)
+# 编译缓存（scripts/compiler_cache.py 作为编译器启动器），需显式开启
+option(ENABLE_COMPILER_CACHE "Wrap compiles with scripts/compiler_cache.py" OFF)
+# 厂商源文件合并编译（scripts/unity_build.py 分组），需显式开启
+option(ENABLE_UNITY_BUILD "Compile vendor sources in unity batches grouped by scripts/unity_build.py" OFF)
+# 合并后的翻译单元数量
+set(OS_UNITY_BATCHES 4 CACHE STRING "Number of unity batches for vendor sources")
@@ -19,10 +19,28 @@
 # ******************************************************************************
 #
 
+# ====================== 生成文件目录 ======================
+# 开启后配置期生成的链接脚本和头文件写入构建目录，不修改源码树（供并行构建矩阵使用）
+option(OS_ISOLATED_BUILD "Write configure-time generated files into the build directory" OFF)
+if(OS_ISOLATED_BUILD)
+    set(OS_GENERATED_DIR "${CMAKE_BINARY_DIR}/generated")
+else()
+    set(OS_GENERATED_DIR "${CMAKE_SOURCE_DIR}")
+endif()
+# ====================== 内存模型 ======================
+set(OS_MEMORY_MODEL "static" CACHE STRING "Memory model: static, mixture or dynamic")
+set_property(CACHE OS_MEMORY_MODEL PROPERTY STRINGS static mixture dynamic)
 # ====================== 链接脚本 ======================
-set(OS_LD_SCRIPT 
-    "${CMAKE_SOURCE_DIR}/os_linker/stm32_f10x/STM32F103md_static.ld"
-)
+if(OS_MEMORY_MODEL STREQUAL "static")
+    # 由 os_config 根据板级配置从模板生成
+    set(OS_LD_SCRIPT 
+        "${OS_GENERATED_DIR}/os_linker/stm32_f10x/STM32F103md_static.ld"
+    )
+else()
+    set(OS_LD_SCRIPT 
+        "${CMAKE_SOURCE_DIR}/os_linker/stm32_f10x/STM32F103md_${OS_MEMORY_MODEL}.ld"
+    )
+endif()
 # ====================== 启动文件 ======================
 set(OS_STARTUP
     "${CMAKE_SOURCE_DIR}/os_boost/stm32_f10x/startup_stm32f10x_md.s"
@@ -39,6 +57,10 @@ set(OS_INC
     "${CMAKE_SOURCE_DIR}/os_service/"
     "${CMAKE_SOURCE_DIR}/os_config/include/"
 )
+# 生成的 os_config/include/memory_layout.hpp 优先于源码树中的副本
+if(OS_ISOLATED_BUILD)
+    list(PREPEND OS_INC "${OS_GENERATED_DIR}/")
+endif()
 # ====================== CMSIS 内核文件 ======================
 file(GLOB_RECURSE OS_CMSIS_SRC
     "${CMAKE_SOURCE_DIR}/libraries/stm32SL/Libraries/CMSIS/CM3/CoreSupport/*.c"
@@ -71,6 +93,12 @@ set(USER_INC
     "${CMAKE_SOURCE_DIR}/user/inc/"
 )
 # ====================== 二进制输出目录 ======================
-set(PROJECT_OUTPUT_DIR
-    "${CMAKE_SOURCE_DIR}/bin/"
-)
\ No newline at end of file
+if(OS_ISOLATED_BUILD)
+    set(PROJECT_OUTPUT_DIR
+        "${CMAKE_BINARY_DIR}/bin/"
+    )
+else()
+    set(PROJECT_OUTPUT_DIR
+        "${CMAKE_SOURCE_DIR}/bin/"
+    )
+endif()
\ No newline at end of file
@@ -578,3 +578,91 @@ function(filter_compile_commands)
         endif()
     endif()
 endfunction()
+
+# 使用 scripts/compiler_cache.py 作为 C/C++ 编译器启动器，需在创建目标之前调用
+function(enable_compiler_cache)
+    if(NOT ENABLE_COMPILER_CACHE)
+        return()
+    endif()
+    # 查找 Python 解释器
+    find_package(Python3 COMPONENTS Interpreter QUIET)
+    if(NOT Python3_FOUND)
+        log_error("enable_compiler_cache: can not find Python3 - compiler cache disabled")
+        return()
+    endif()
+    if(NOT EXISTS "${COMPILER_CACHE_PY_SCRIPT}")
+        log_error("enable_compiler_cache: can not find script ${COMPILER_CACHE_PY_SCRIPT}")
+        return()
+    endif()
+
+    set(launcher ${Python3_EXECUTABLE} "${COMPILER_CACHE_PY_SCRIPT}")
+    if(COMPILER_CACHE_DIR)
+        list(APPEND launcher "--dir=${COMPILER_CACHE_DIR}")
+    endif()
+    set(CMAKE_C_COMPILER_LAUNCHER ${launcher} PARENT_SCOPE)
+    set(CMAKE_CXX_COMPILER_LAUNCHER ${launcher} PARENT_SCOPE)
+    log_info("compiler cache enabled: ${COMPILER_CACHE_PY_SCRIPT}")
+    if(COMPILER_CACHE_DIR)
+        log_info("  - cache directory: ${COMPILER_CACHE_DIR}")
+    endif()
+endfunction()
+
+# 将目标的 C 源文件按大小均衡地分组合并编译，存在符号或宏冲突的文件分到不同组或单独编译
+function(configure_unity_build target_name)
+    if(NOT ENABLE_UNITY_BUILD)
+        return()
+    endif()
+    # 查找 Python 解释器
+    find_package(Python3 COMPONENTS Interpreter QUIET)
+    if(NOT Python3_FOUND)
+        log_error("configure_unity_build: can not find Python3 - unity build disabled")
+        return()
+    endif()
+    if(NOT EXISTS "${UNITY_BUILD_PY_SCRIPT}")
+        log_error("configure_unity_build: can not find script ${UNITY_BUILD_PY_SCRIPT}")
+        return()
+    endif()
+
+    get_target_property(target_sources ${target_name} SOURCES)
+    list(FILTER target_sources INCLUDE REGEX "\\.c$")
+    if(NOT target_sources)
+        log_info("configure_unity_build: ${target_name} has no C sources")
+        return()
+    endif()
+
+    set(unity_script "${CMAKE_BINARY_DIR}/unity/${target_name}.cmake")
+    execute_process(
+        COMMAND ${Python3_EXECUTABLE}
+                "${UNITY_BUILD_PY_SCRIPT}"
+                "--output" "${unity_script}"
+                "--batches" "${OS_UNITY_BATCHES}"
+                "--group-prefix" "${target_name}"
+                ${target_sources}
+        WORKING_DIRECTORY ${CMAKE_SOURCE_DIR}
+        RESULT_VARIABLE result_code
+        OUTPUT_VARIABLE output_text
+        ERROR_VARIABLE error_text
+        OUTPUT_STRIP_TRAILING_WHITESPACE
+        ERROR_STRIP_TRAILING_WHITESPACE
+    )
+    if(NOT result_code EQUAL 0)
+        log_error("configure_unity_build: failed, ${target_name} builds file by file")
+        if(error_text)
+            log_error("  - ${error_text}")
+        endif()
+        return()
+    endif()
+
+    include(${unity_script})
+    set_target_properties(${target_name} PROPERTIES
+        UNITY_BUILD ON
+        UNITY_BUILD_MODE GROUP
+    )
+    # 源文件修改后重新分析冲突
+    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS ${target_sources})
+    log_info("configure_unity_build: ${target_name}")
+    if(output_text)
+        string(REGEX REPLACE "\n" "\n${log_head_padding}- " output_indented "  ${output_text}")
+        log_info("${output_indented}")
+    endif()
+endfunction()
@@ -29,6 +29,12 @@ set(CLANG_CFG_PY_SCRIPT "${CMAKE_SOURCE_DIR}/scripts/cfg_clangd.py")
 set(CLANG_FILTER_PY_SCRIPT "${CMAKE_SOURCE_DIR}/scripts/filter_compile_commands.py")
 # 过滤后的编译数据库路径，应和clangd模板文件一致
 set(CLANG_FILTER_JSON_PATH "${CMAKE_SOURCE_DIR}/build/filtered")
+# 编译缓存启动器脚本路径，请勿修改
+set(COMPILER_CACHE_PY_SCRIPT "${CMAKE_SOURCE_DIR}/scripts/compiler_cache.py")
+# 合并编译分组脚本路径，请勿修改
+set(UNITY_BUILD_PY_SCRIPT "${CMAKE_SOURCE_DIR}/scripts/unity_build.py")
+# 编译缓存目录，为空时使用环境变量 STRATOS_CACHE_DIR 或 ~/.cache/stratos/compiler
+set(COMPILER_CACHE_DIR "" CACHE PATH "Compiler cache directory")
 
 # 模板文件
 set(TIDY_TEMPLATE "${CMAKE_SOURCE_DIR}/.clang-tidy.template.yml")
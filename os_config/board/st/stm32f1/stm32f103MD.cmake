@@ -18,4 +18,4 @@ set(_KERNEL_STACK_SIZE_ 0x1000)                         # Reserve 4 KB for kerne
 
 set(_KERNEL_POOL_SIZE_ 0x1000)                          # Reserve 4 KB for kernel pool (static kernel objects)
 
-set(_OS_MEMORY_LAYOUT_TYPE_ "StaticLayout")             # Use static layout: all sections placed at fixed addresses
\ No newline at end of file
+# _OS_MEMORY_LAYOUT_TYPE_ is derived from the OS_MEMORY_MODEL cache option (default "static" -> StaticLayout)
\ No newline at end of file
@@ -14,17 +14,19 @@
 #define STRATOS_POLICY_KERNEL_DYNAMIC_POOL_HPP
 
 #include "os_kernel/include/core/common_traits.hpp"
+#include "os_kernel/include/policy/memory/trace.hpp"
 #include <cstddef> // for std::size_t
 #include <cstdint> // for std::uintptr_t, std::uint8_t
 
 namespace strat_os::kernel::policy::builtin
 {
 
-template <typename Region, std::size_t BlockSize, std::size_t BlockCount>
+template <typename Region, std::size_t BlockSize, std::size_t BlockCount, typename TracePolicy = NullAllocTracePolicy>
 struct DynamicPoolPolicy {
     static_assert(::strat_os::kernel::traits::is_region_v<Region>, "Region must be a valid MemoryRegion");
 
     using region                             = Region;
+    using trace_policy                       = TracePolicy;
     using size_type                          = std::size_t;
     using difference_type                    = std::ptrdiff_t;
     using pointer                            = void*;
@@ -37,7 +39,60 @@ struct DynamicPoolPolicy {
     static constexpr std::size_t size        = region::layout::size;
     static constexpr bool is_dynamic         = region::mode::is_dynamic;
 
-    alignas(std::max_align_t) static std::uint8_t pool[block_size * block_count]{};
+    static_assert(block_count > 0, "DynamicPoolPolicy requires a non-zero block count");
+    static_assert(block_size >= sizeof(void*) && block_size % alignof(void*) == 0,
+                  "DynamicPoolPolicy blocks must be able to hold an aligned free-list link");
+
+    alignas(std::max_align_t) inline static std::uint8_t pool[block_size * block_count]{};
+
+    /**
+     * @brief 分配一个块
+     * @param size 请求字节数，超过 block_size 时分配失败
+     * @return 指向块的指针，失败返回 nullptr
+     */
+    [[nodiscard]] inline static void* allocate(const std::size_t size) noexcept {
+        void* ptr = nullptr;
+        if (size <= block_size) {
+            if (free_list_ != nullptr) {
+                ptr        = free_list_;
+                free_list_ = *static_cast<void**>(ptr);
+            } else if (next_unused_ < block_count) {
+                // 从未使用过的块按顺序切出，无需初始化阶段
+                ptr = &pool[block_size * next_unused_++];
+            }
+        }
+        if (ptr != nullptr) {
+            ++used_count_;
+        }
+        trace_policy::on_allocate(base, size, ptr);
+        return ptr;
+    }
+
+    /**
+     * @brief 归还一个块，nullptr 被忽略
+     */
+    inline static void deallocate(void* ptr) noexcept {
+        if (ptr == nullptr) {
+            return;
+        }
+        trace_policy::on_deallocate(base, ptr);
+        *static_cast<void**>(ptr) = free_list_;
+        free_list_                = ptr;
+        --used_count_;
+    }
+
+    [[nodiscard]] inline static constexpr std::size_t get_total_size() noexcept {
+        return block_size * block_count;
+    }
+
+    [[nodiscard]] inline static std::size_t get_used_size() noexcept {
+        return block_size * used_count_;
+    }
+
+private:
+    inline static void* free_list_{};
+    inline static std::size_t next_unused_{};
+    inline static std::size_t used_count_{};
 };
 
 } // namespace strat_os::kernel::policy::builtin
@@ -42,7 +42,7 @@ struct GlobalPoolPolicy {
     using pointer         = void*;
     using const_pointer   = const void*;
 
-    alignas(std::max_align_t) static std::uint8_t pool[GlobalSize]{};
+    alignas(std::max_align_t) inline static std::uint8_t pool[GlobalSize]{};
 
     inline static void* allocate(std::size_t size) noexcept {
         if constexpr (is_dynamic) {
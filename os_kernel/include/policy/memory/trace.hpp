@@ -0,0 +1,128 @@
+/**
+ * @file trace.hpp
+ * @author StratOS Team
+ * @brief 内存池分配追踪策略
+ * @version 0.1
+ * @date 2026-10-19
+ *
+ * @copyright Copyright (c) 2026 StratOS
+ *
+ * @details
+ * DynamicPoolPolicy 通过可选模板参数 `TracePolicy` 在每次分配/释放时回调追踪策略
+ * （StaticPoolPolicy、GlobalPoolPolicy 尚无实际分配逻辑，暂不接入）。追踪策略必须提供：
+ * - static void on_allocate(std::uintptr_t pool, std::size_t size, const void* ptr) noexcept
+ * - static void on_deallocate(std::uintptr_t pool, const void* ptr) noexcept
+ *
+ * 其中 pool 为池的基地址，用于区分不同的池；ptr 为 nullptr 表示分配失败。
+ *
+ * 默认使用 NullAllocTracePolicy，所有回调为空函数，编译后零开销。
+ * RecordAllocTracePolicy 将事件记录到静态缓冲区，记录格式固定为 4 个小端 uint32
+ * （op, pool, size, addr），可直接用调试器导出后交给主机端工具
+ * tools/profiling/pool_layout_optimizer.py 分析：
+ * @code
+ * (gdb) dump binary memory trace.bin \
+ *       &Trace::records_[0] &Trace::records_[Trace::count_]
+ * @endcode
+ *
+ * @warning RecordAllocTracePolicy 本身不加锁，应在池的分配锁内调用。
+ */
+#pragma once
+
+#ifndef STRATOS_POLICY_KERNEL_TRACE_HPP
+#define STRATOS_POLICY_KERNEL_TRACE_HPP
+
+#include <cstddef> // for std::size_t
+#include <cstdint> // for std::uintptr_t, std::uint32_t
+
+namespace strat_os::kernel::policy::builtin
+{
+
+/**
+ * @brief 空追踪策略（默认），不产生任何代码
+ */
+struct NullAllocTracePolicy {
+    static constexpr bool enabled = false;
+
+    inline static void on_allocate(std::uintptr_t, std::size_t, const void*) noexcept {}
+
+    inline static void on_deallocate(std::uintptr_t, const void*) noexcept {}
+};
+
+/**
+ * @brief 追踪记录，布局与主机端工具约定一致
+ */
+struct AllocTraceRecord {
+    enum : std::uint32_t {
+        allocateOp   = 1,
+        deallocateOp = 2,
+    };
+
+    std::uint32_t op;
+    std::uint32_t pool;
+    std::uint32_t size;
+    std::uint32_t addr;
+};
+
+static_assert(sizeof(AllocTraceRecord) == 16, "AllocTraceRecord layout is shared with host tools");
+
+/**
+ * @brief 记录型追踪策略
+ * @tparam Capacity 最多记录的事件数，超出后只计数不记录
+ */
+template <std::size_t Capacity>
+struct RecordAllocTracePolicy {
+    static_assert(Capacity > 0, "RecordAllocTracePolicy requires a non-zero capacity");
+
+    static constexpr bool enabled = true;
+
+    inline static AllocTraceRecord records_[Capacity]{};
+    inline static std::size_t count_{};
+    inline static std::size_t dropped_{};
+
+    inline static void on_allocate(std::uintptr_t pool, std::size_t size, const void* ptr) noexcept {
+        record(AllocTraceRecord::allocateOp, pool, size, ptr);
+    }
+
+    inline static void on_deallocate(std::uintptr_t pool, const void* ptr) noexcept {
+        if (ptr == nullptr) {
+            return;
+        }
+        record(AllocTraceRecord::deallocateOp, pool, 0, ptr);
+    }
+
+    [[nodiscard]] inline static const AllocTraceRecord* records() noexcept {
+        return records_;
+    }
+
+    [[nodiscard]] inline static std::size_t count() noexcept {
+        return count_;
+    }
+
+    /**
+     * @brief 缓冲区满后丢弃的事件数，非零时追踪不完整
+     */
+    [[nodiscard]] inline static std::size_t dropped() noexcept {
+        return dropped_;
+    }
+
+    inline static void reset() noexcept {
+        count_   = 0;
+        dropped_ = 0;
+    }
+
+private:
+    inline static void record(std::uint32_t op, std::uintptr_t pool, std::size_t size, const void* ptr) noexcept {
+        if (count_ >= Capacity) {
+            ++dropped_;
+            return;
+        }
+        records_[count_++] = AllocTraceRecord{op,
+                                              static_cast<std::uint32_t>(pool),
+                                              static_cast<std::uint32_t>(size),
+                                              static_cast<std::uint32_t>(reinterpret_cast<std::uintptr_t>(ptr))};
+    }
+};
+
+} // namespace strat_os::kernel::policy::builtin
+
+#endif // STRATOS_POLICY_KERNEL_TRACE_HPP
@@ -0,0 +1,12 @@
+/**
+ * @file test_main.cpp
+ * @author StratOS Team
+ * @brief 主机端测试公共入口
+ * @version 0.1
+ * @date 2026-10-19
+ *
+ * @copyright Copyright (c) 2026
+ *
+ */
+#define DOCTEST_CONFIG_IMPLEMENT_WITH_MAIN
+#include "doctest/doctest.h"
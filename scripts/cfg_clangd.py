@@ -4,7 +4,12 @@
 """
 cfg_clangd.py
 
-Generates .clangd configuration and clangd_fallback_flags.json for StratOS project.
+Generates .clangd, .clang-tidy and clangd_fallback_flags.json for StratOS project.
+
+The compiler is probed once (predefined macros and system include paths come
+from a single invocation) and the results are shared by every output. Each
+output is only written when its content changed, so clangd does not reload
+and re-index on every CMake configure.
 
 Usage:
     python cfg_clangd.py
@@ -16,18 +21,71 @@ import sys
 import os
 import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+
+class TemplateEngine:
+    """
+    Placeholder renderer shared by all templates.
+
+    All placeholders are compiled into one regular expression. A list
+    placeholder that is alone on its line expands to one YAML list item per
+    value at the line's indentation; used inline it expands comma-separated.
+    """
+
+    LIST_LINE = re.compile(r"^(?P<indent>\s*)\{(?P<name>[^{}]+)\}\s*$")
+
+    def __init__(self, scalars: Dict[str, str], lists: Dict[str, List[str]],
+                 empty_notes: Optional[Dict[str, str]] = None) -> None:
+        self.scalars = scalars
+        self.lists = lists
+        self.empty_notes = empty_notes or {}
+        names = sorted(list(scalars) + list(lists), key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape("{" + name + "}") for name in names)) if names else None
+
+    def render(self, lines: List[str]) -> List[str]:
+        if self.pattern is None:
+            return list(lines)
+        rendered: List[str] = []
+        for line in lines:
+            if "{" not in line:
+                rendered.append(line)
+                continue
+            list_line = self.LIST_LINE.match(line)
+            if list_line and list_line.group("name") in self.lists:
+                rendered.extend(self._expand_list(list_line.group("name"), list_line.group("indent")))
+                continue
+            rendered.append(self.pattern.sub(self._replace_inline, line))
+        return rendered
+
+    def _expand_list(self, name: str, indent: str) -> List[str]:
+        values = self.lists[name]
+        if not values:
+            note = self.empty_notes.get(name, f"No {name} provided")
+            return [f"{indent}# {note}\n"]
+        return [f"{indent}- {value}\n" for value in values]
+
+    def _replace_inline(self, match: "re.Match") -> str:
+        name = match.group(0)[1:-1]
+        if name in self.scalars:
+            return self.scalars[name]
+        return ", ".join(self.lists[name])
 
 
 class ClangdConfigGenerator:
-    """Generates .clangd and fallback flags from a template and JSON config."""
+    """Generates .clangd, .clang-tidy and fallback flags from templates and JSON config."""
 
-    def __init__(self, config_path: Path, template_path: Path, output_path: Path) -> None:
+    def __init__(self, config_path: Path, template_path: Path, output_path: Path,
+                 tidy_template_path: Optional[Path] = None, tidy_output_path: Optional[Path] = None) -> None:
         self.config_path = config_path
         self.template_path = template_path
         self.output_path = output_path
+        self.tidy_template_path = tidy_template_path
+        self.tidy_output_path = tidy_output_path
         self.config: Dict = {}
         self.template_lines: List[str] = []
+        self._probe: Optional[Tuple[List[str], List[str]]] = None
+        self._probe_error: Optional[Exception] = None
 
     # -------------------------------------------------------------------------
     # Public entry point
@@ -35,11 +93,15 @@ class ClangdConfigGenerator:
     def run(self) -> None:
         self.load_config()
         self.load_template()
-        processed_lines = self.process_template()
-        self.write_output(processed_lines)
+        engine = self.build_engine()
+
+        processed_lines = engine.render(self.template_lines)
+        self.report(self.output_path, self.write_output(processed_lines))
+
+        if self.tidy_template_path is not None and self.tidy_output_path is not None:
+            self.generate_tidy_config(engine)
+
         self.generate_fallback_flags()
-        print(f"Successfully generated {self.output_path}")
-        print(f"Successfully generated fallback flags in project root")
 
     # -------------------------------------------------------------------------
     # Configuration loading
@@ -87,27 +149,57 @@ class ClangdConfigGenerator:
     # -------------------------------------------------------------------------
     # Compiler interrogation
     # -------------------------------------------------------------------------
+    def probe_compiler(self) -> Tuple[List[str], List[str]]:
+        """
+        Run the compiler once and return (predefine flags, system include paths).
+        `-dM` prints the macros on stdout while `-v` prints the search list on
+        stderr, so one invocation serves every output. The result is cached.
+        """
+        if self._probe is not None:
+            return self._probe
+        if self._probe_error is not None:
+            raise self._probe_error
+
+        compiler = self.config["clangd"]["g++_compiler_path"]
+        try:
+            if not os.path.isfile(compiler):
+                raise FileNotFoundError(f"Compiler not found: {compiler}")
+
+            cmd = [compiler, "-E", "-dM", "-x", "c++", "-std=c++17", "-", "-v"]
+            try:
+                result = subprocess.run(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=True,
+                )
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"Failed to run compiler {compiler}: {e.stderr}") from e
+        except Exception as e:
+            self._probe_error = e
+            raise
+
+        self._probe = (self._parse_predefines(result.stdout), self._parse_system_includes(result.stderr))
+        return self._probe
+
     def get_gcc_predefines(self) -> List[str]:
         """Return list of -D flags from compiler's predefined macros."""
-        compiler = self.config["clangd"]["g++_compiler_path"]
-        if not os.path.isfile(compiler):
-            raise FileNotFoundError(f"Compiler not found: {compiler}")
+        return self.probe_compiler()[0]
 
-        cmd = [compiler, "-E", "-dM", "-x", "c++", "-std=c++17", "-"]
+    def get_system_include_paths(self) -> List[str]:
+        """Return list of system include directories (for -isystem)."""
         try:
-            result = subprocess.run(
-                cmd,
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Failed to run compiler {compiler}: {e.stderr}") from e
+            return self.probe_compiler()[1]
+        except Exception as e:
+            print(f"Warning: Failed to get system includes: {e}", file=sys.stderr)
+            return []
 
+    @staticmethod
+    def _parse_predefines(output: str) -> List[str]:
         flags = []
-        for line in result.stdout.splitlines():
+        for line in output.splitlines():
             line = line.strip()
             if line.startswith("#define "):
                 parts = line[8:].split(maxsplit=1)
@@ -119,27 +211,9 @@ class ClangdConfigGenerator:
                     flags.append(f"-D{macro}")
         return flags
 
-    def get_system_include_paths(self) -> List[str]:
-        """Return list of system include directories (for -isystem)."""
-        compiler = self.config["clangd"]["g++_compiler_path"]
-        if not os.path.isfile(compiler):
-            return []
-
-        cmd = [compiler, "-E", "-x", "c++", "-std=c++17", "-", "-v"]
-        try:
-            result = subprocess.run(
-                cmd,
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False,
-            )
-        except Exception as e:
-            print(f"Warning: Failed to get system includes: {e}", file=sys.stderr)
-            return []
-
-        lines = result.stderr.splitlines()
+    @staticmethod
+    def _parse_system_includes(output: str) -> List[str]:
+        lines = output.splitlines()
         paths = []
         start_marker = "#include <...> search starts here:"
         end_marker = "End of search list."
@@ -160,69 +234,71 @@ class ClangdConfigGenerator:
     # -------------------------------------------------------------------------
     # Template processing
     # -------------------------------------------------------------------------
-    def process_template(self) -> List[str]:
-        processed_lines = []
-        proj_defs_lines: Optional[List[str]] = None
-        gcc_predef_lines: Optional[List[str]] = None
-
-        simple_replacements = {
-            "{your_compiler_path}": self.normalize_path(self.config["clangd"]["g++_compiler_path"]),
-            "{your_toolchain_path}": self.normalize_path(self.config["clangd"]["toolchain_root_path"]),
-            "{project_root}": self.normalize_path(self.config["clangd"]["project_root"]),
+    def build_engine(self) -> TemplateEngine:
+        """Collect every placeholder value once; all templates render from the same probe."""
+        clangd = self.config["clangd"]
+        scalars = {
+            "your_compiler_path": self.normalize_path(clangd["g++_compiler_path"]),
+            "your_toolchain_path": self.normalize_path(clangd["toolchain_root_path"]),
+            "project_root": self.normalize_path(clangd["project_root"]),
+        }
+        lists = {
+            "project_definitions": [f"-D{macro}" for macro in clangd["project_definitions"]],
+        }
+        empty_notes = {
+            "project_definitions": "No project definitions provided",
         }
-
-        for line in self.template_lines:
-            if "{project_definitions}" in line:
-                if proj_defs_lines is None:
-                    proj_defs_lines = self._generate_project_definitions(line)
-                processed_lines.extend(proj_defs_lines)
-                continue
-
-            if "{g++_predefines}" in line:
-                if gcc_predef_lines is None:
-                    gcc_predef_lines = self._generate_gcc_predefines(line)
-                processed_lines.extend(gcc_predef_lines)
-                continue
-
-            for placeholder, value in simple_replacements.items():
-                if placeholder in line:
-                    line = line.replace(placeholder, value)
-            processed_lines.append(line)
-
-        return processed_lines
-
-    def _generate_project_definitions(self, template_line: str) -> List[str]:
-        indent = self._get_indent(template_line)
-        definitions = self.config["clangd"]["project_definitions"]
-        lines = []
-        for macro in definitions:
-            lines.append(f"{indent}- -D{macro}\n")
-        if not lines:
-            lines.append(f"{indent}# No project definitions provided\n")
-        return lines
-
-    def _generate_gcc_predefines(self, template_line: str) -> List[str]:
-        indent = self._get_indent(template_line)
         try:
-            predefines = self.get_gcc_predefines()
+            lists["g++_predefines"] = self.get_gcc_predefines()
         except Exception as e:
             print(f"Warning: Could not obtain predefined macros: {e}", file=sys.stderr)
-            return [f"{indent}# Failed to obtain compiler predefines: {e}\n"]
+            lists["g++_predefines"] = []
+            empty_notes["g++_predefines"] = f"Failed to obtain compiler predefines: {e}"
+        return TemplateEngine(scalars, lists, empty_notes)
 
-        lines = []
-        for flag in predefines:
-            lines.append(f"{indent}- {flag}\n")
-        return lines
+    def process_template(self) -> List[str]:
+        return self.build_engine().render(self.template_lines)
 
     @staticmethod
-    def _get_indent(line: str) -> str:
-        match = re.match(r"^\s*", line)
-        return match.group(0) if match else ""
+    def write_if_changed(path: Path, content: str) -> bool:
+        """Write content to path unless it already holds exactly that; return True if written."""
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                if f.read() == content:
+                    return False
+        except (OSError, UnicodeDecodeError):
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        return True
+
+    @staticmethod
+    def report(path: Path, written: bool) -> None:
+        if written:
+            print(f"Successfully generated {path}")
+        else:
+            print(f"{path} is up to date")
 
-    def write_output(self, lines: List[str]) -> None:
-        self.output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+    def write_output(self, lines: List[str]) -> bool:
+        return self.write_if_changed(self.output_path, "".join(lines))
+
+    # -------------------------------------------------------------------------
+    # clang-tidy generation
+    # -------------------------------------------------------------------------
+    def generate_tidy_config(self, engine: TemplateEngine) -> None:
+        """Render .clang-tidy from its template with the same placeholder values."""
+        if not self.tidy_template_path.is_file():
+            raise FileNotFoundError(f"Template file not found: {self.tidy_template_path}")
+        with open(self.tidy_template_path, 'r', encoding='utf-8') as f:
+            tidy_lines = f.readlines()
+        if not any(line.strip() for line in tidy_lines):
+            print(f"Warning: {self.tidy_template_path} is empty, skipping .clang-tidy", file=sys.stderr)
+            return
+        written = self.write_if_changed(self.tidy_output_path, "".join(engine.render(tidy_lines)))
+        self.report(self.tidy_output_path, written)
 
     # -------------------------------------------------------------------------
     # Fallback flags generation
@@ -280,9 +356,8 @@ class ClangdConfigGenerator:
 
         # Write JSON
         fallback_file = self.output_path.parent / "clangd_fallback_flags.json"
-        with open(fallback_file, 'w', encoding='utf-8') as f:
-            json.dump(flags, f, indent=2)
-        print(f"Generated fallback flags: {fallback_file}")
+        written = self.write_if_changed(fallback_file, json.dumps(flags, indent=2))
+        self.report(fallback_file, written)
 
     @staticmethod
     def _deduplicate_defines(flags: List[str]) -> List[str]:
@@ -312,6 +387,8 @@ def main():
     config_file = project_root / "clangd_config.json"
     template_file = project_root / ".clangd.template.yml"
     output_file = project_root / ".clangd"   # change to .clangd when ready
+    tidy_template_file = project_root / ".clang-tidy.template.yml"
+    tidy_output_file = project_root / ".clang-tidy"
 
     # Allow overrides via environment variables
     if "CLANGD_CONFIG" in os.environ:
@@ -320,8 +397,13 @@ def main():
         template_file = Path(os.environ["CLANGD_TEMPLATE"])
     if "CLANGD_OUTPUT" in os.environ:
         output_file = Path(os.environ["CLANGD_OUTPUT"])
+    if "CLANG_TIDY_TEMPLATE" in os.environ:
+        tidy_template_file = Path(os.environ["CLANG_TIDY_TEMPLATE"])
+    if "CLANG_TIDY_OUTPUT" in os.environ:
+        tidy_output_file = Path(os.environ["CLANG_TIDY_OUTPUT"])
 
-    generator = ClangdConfigGenerator(config_file, template_file, output_file)
+    generator = ClangdConfigGenerator(config_file, template_file, output_file,
+                                      tidy_template_file, tidy_output_file)
     generator.run()
 
 
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite index over CMake's compile_commands.json.
+
+The index is maintained by filter_compile_commands.py every time the
+compilation database is filtered, and updated incrementally: only entries
+whose content changed are rewritten. Argument lists are interned, so the many
+TUs that share the same flags store them once; per-file parts (output, source,
+dependency-file options) are stripped before interning and are not returned by
+the flags/command queries.
+
+Usage:
+    compile_db_index.py [--index PATH] flags FILE        # arguments for FILE
+    compile_db_index.py [--index PATH] command FILE      # full command for FILE
+    compile_db_index.py [--index PATH] files [--component NAME] [--directory DIR] [--argset ID]
+    compile_db_index.py [--index PATH] components
+    compile_db_index.py [--index PATH] update [--database PATH]
+
+Add --json to any query to get machine-readable output. The default index path
+is build/compile_commands.index.sqlite under the project root.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Per-file dependency-file options (same sets as scripts/compiler_cache.py)
+DEPENDENCY_FLAGS = {"-MD", "-MMD", "-MP"}
+DEPENDENCY_OPTIONS = {"-MF", "-MT", "-MQ"}
+
+
+class CompilationDatabaseIndex:
+    """SQLite index of compile_commands.json keyed by file, directory, component and argument set."""
+
+    SCHEMA_VERSION = "2"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS argsets (
+            id        INTEGER PRIMARY KEY,
+            hash      TEXT NOT NULL UNIQUE,
+            arguments TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            file       TEXT PRIMARY KEY,
+            directory  TEXT NOT NULL,
+            component  TEXT NOT NULL,
+            argset_id  INTEGER NOT NULL REFERENCES argsets(id),
+            output     TEXT,
+            entry_hash TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_directory ON entries(directory);
+        CREATE INDEX IF NOT EXISTS entries_component ON entries(component);
+        CREATE INDEX IF NOT EXISTS entries_argset    ON entries(argset_id);
+    """
+
+    def __init__(self, index_path: Path, project_root: Path) -> None:
+        self.index_path = Path(index_path)
+        self.project_root = Path(project_root).resolve()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.index_path))
+        self.conn.executescript(self.SCHEMA)
+        if self._get_meta("schema_version") != self.SCHEMA_VERSION:
+            self._reset()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -------------------------------------------------------------------------
+    # Path helpers
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        """Convert backslashes to forward slashes and remove trailing slash (except root)."""
+        path = path.replace("\\", "/")
+        if path.endswith("/") and not path == "/":
+            path = path.rstrip("/")
+        return path
+
+    def resolve(self, path: str, base: Optional[str] = None) -> str:
+        """Absolute, normalized form of path (relative paths are taken from base or cwd)."""
+        p = Path(path)
+        if not p.is_absolute():
+            p = Path(base) / p if base else Path.cwd() / p
+        return self.normalize_path(os.path.normpath(str(p)))
+
+    def component_of(self, file_path: str) -> str:
+        """Top-level project directory of a file (two levels under libraries/)."""
+        root = self.normalize_path(str(self.project_root))
+        if not file_path.startswith(root + "/"):
+            return "<external>"
+        parts = file_path[len(root) + 1:].split("/")
+        if len(parts) == 1:
+            return "<root>"
+        if parts[0] == "libraries" and len(parts) > 2:
+            return f"{parts[0]}/{parts[1]}"
+        return parts[0]
+
+    # -------------------------------------------------------------------------
+    # Update
+    # -------------------------------------------------------------------------
+    def update(self, entries: List[Dict[str, Any]], source_hash: Optional[str] = None) -> Tuple[int, int, int]:
+        """
+        Bring the index in line with entries. Returns (added_or_changed, removed, unchanged).
+        If source_hash matches the one recorded by the previous update, nothing is done.
+        """
+        if source_hash is not None and self._get_meta("source_hash") == source_hash:
+            count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return 0, 0, count
+
+        # A file listed more than once keeps its last entry, so duplicates resolve the
+        # same way on every update and are not rewritten back and forth
+        latest: Dict[str, Tuple[Dict[str, Any], str, str]] = {}
+        for entry in entries:
+            file_field = entry.get("file")
+            if not file_field:
+                continue
+            directory = self.resolve(entry.get("directory", "."))
+            latest[self.resolve(file_field, directory)] = (entry, file_field, directory)
+
+        existing = dict(self.conn.execute("SELECT file, entry_hash FROM entries"))
+        seen = set(latest)
+        changed = 0
+        with self.conn:
+            for file_path, (entry, file_field, directory) in latest.items():
+                entry_hash = self._hash_json(entry)
+                if existing.get(file_path) == entry_hash:
+                    continue
+
+                arguments, output = self._split_arguments(entry, file_field, file_path, directory)
+                argset_id = self._intern_arguments(arguments)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO entries (file, directory, component, argset_id, output, entry_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_path, directory, self.component_of(file_path), argset_id, output, entry_hash),
+                )
+                changed += 1
+
+            removed = [f for f in existing if f not in seen]
+            self.conn.executemany("DELETE FROM entries WHERE file = ?", [(f,) for f in removed])
+            if removed or changed:
+                self.conn.execute("DELETE FROM argsets WHERE id NOT IN (SELECT DISTINCT argset_id FROM entries)")
+            if source_hash is not None:
+                self._set_meta("source_hash", source_hash)
+
+        return changed, len(removed), len(seen) - changed
+
+    def update_from_file(self, database_path: Path) -> Tuple[int, int, int]:
+        data = Path(database_path).read_bytes()
+        entries = json.loads(data.decode("utf-8"))
+        if not isinstance(entries, list):
+            raise ValueError("Expected compile_commands.json to contain a JSON array.")
+        return self.update(entries, hashlib.sha256(data).hexdigest())
+
+    def _split_arguments(self, entry: Dict[str, Any], file_field: str, file_path: str,
+                         directory: str) -> Tuple[List[str], Optional[str]]:
+        """Strip the per-file parts (-o OUTPUT, -c FILE, -MD -MT/-MF ...) so identical flag sets intern together."""
+        if "arguments" in entry:
+            raw = list(entry["arguments"])
+        else:
+            raw = shlex.split(entry.get("command", ""), posix=(os.name != "nt"))
+
+        arguments: List[str] = []
+        output = entry.get("output")
+        i = 0
+        while i < len(raw):
+            arg = raw[i]
+            if arg == "-o" and i + 1 < len(raw):
+                output = raw[i + 1]
+                i += 2
+                continue
+            if arg == "-c" or arg in DEPENDENCY_FLAGS:
+                i += 1
+                continue
+            if arg in DEPENDENCY_OPTIONS:
+                i += 2
+                continue
+            if arg[:3] in DEPENDENCY_OPTIONS:
+                # Joined form, e.g. -MFfoo.o.d
+                i += 1
+                continue
+            if arg == file_field or self.resolve(arg, directory) == file_path:
+                i += 1
+                continue
+            arguments.append(arg)
+            i += 1
+        return arguments, output
+
+    def _intern_arguments(self, arguments: List[str]) -> int:
+        encoded = json.dumps(arguments)
+        digest = hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+        row = self.conn.execute("SELECT id FROM argsets WHERE hash = ?", (digest,)).fetchone()
+        if row:
+            return row[0]
+        cursor = self.conn.execute("INSERT INTO argsets (hash, arguments) VALUES (?, ?)", (digest, encoded))
+        return cursor.lastrowid
+
+    @staticmethod
+    def _hash_json(value: Any) -> str:
+        return hashlib.sha1(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _reset(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM argsets")
+            self.conn.execute("DELETE FROM meta")
+            self._set_meta("schema_version", self.SCHEMA_VERSION)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def flags(self, file_path: str) -> Optional[List[str]]:
+        """Compiler and flags used for a file (without -o/-c/file)."""
+        row = self.conn.execute(
+            "SELECT a.arguments FROM entries e JOIN argsets a ON a.id = e.argset_id WHERE e.file = ?",
+            (self.resolve(file_path),),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def entry(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """A compile_commands.json style entry rebuilt from the index."""
+        row = self.conn.execute(
+            "SELECT e.file, e.directory, e.output, a.arguments FROM entries e "
+            "JOIN argsets a ON a.id = e.argset_id WHERE e.file = ?",
+            (self.resolve(file_path),),
+        ).fetchone()
+        if not row:
+            return None
+        file_name, directory, output, arguments = row
+        arguments = json.loads(arguments)
+        if output:
+            arguments += ["-o", output]
+        arguments += ["-c", file_name]
+        result = {"directory": directory, "file": file_name, "arguments": arguments}
+        if output:
+            result["output"] = output
+        return result
+
+    def files(self, component: Optional[str] = None, directory: Optional[str] = None,
+              argset_id: Optional[int] = None) -> List[str]:
+        """Files matching all given filters; directory matches the whole subtree."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if component is not None:
+            clauses.append("component = ?")
+            params.append(component)
+        if directory is not None:
+            prefix = self.resolve(directory)
+            clauses.append("(file = ? OR substr(file, 1, ?) = ?)")
+            params.extend([prefix, len(prefix) + 1, prefix + "/"])
+        if argset_id is not None:
+            clauses.append("argset_id = ?")
+            params.append(argset_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [r[0] for r in self.conn.execute(f"SELECT file FROM entries{where} ORDER BY file", params)]
+
+    def argset_id(self, file_path: str) -> Optional[int]:
+        row = self.conn.execute("SELECT argset_id FROM entries WHERE file = ?", (self.resolve(file_path),)).fetchone()
+        return row[0] if row else None
+
+    def components(self) -> Dict[str, int]:
+        return dict(self.conn.execute(
+            "SELECT component, COUNT(*) FROM entries GROUP BY component ORDER BY component"
+        ))
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def main() -> int:
+    project_root = Path(__file__).resolve().parent.parent
+    default_index = project_root / "build" / "compile_commands.index.sqlite"
+
+    parser = argparse.ArgumentParser(description="Query the compile_commands.json index")
+    parser.add_argument("--index", type=str, default=str(default_index), help="Path of the SQLite index")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_flags = sub.add_parser("flags", help="Print the arguments used to compile FILE")
+    p_flags.add_argument("file")
+    p_command = sub.add_parser("command", help="Print the full compile command entry for FILE")
+    p_command.add_argument("file")
+    p_files = sub.add_parser("files", help="List indexed translation units")
+    p_files.add_argument("--component", type=str, help="Top-level component, e.g. os_kernel")
+    p_files.add_argument("--directory", type=str, help="Only files under this directory")
+    p_files.add_argument("--argset", type=int, help="Only files compiled with this argument set id")
+    p_files.add_argument("--same-flags-as", type=str, help="Only files compiled exactly like this file")
+    sub.add_parser("components", help="List components and their TU counts")
+    p_update = sub.add_parser("update", help="Update the index from a compilation database")
+    p_update.add_argument("--database", type=str, default=str(project_root / "build" / "filtered" / "compile_commands.json"))
+    args = parser.parse_args()
+
+    index_path = Path(args.index)
+    if args.command != "update" and not index_path.is_file():
+        print(f"Index not found: {index_path} (run the CMake configure step first)", file=sys.stderr)
+        return 1
+
+    index = CompilationDatabaseIndex(index_path, project_root)
+    try:
+        if args.command == "update":
+            changed, removed, unchanged = index.update_from_file(Path(args.database))
+            print(f"Index updated: {changed} changed, {removed} removed, {unchanged} unchanged")
+            return 0
+
+        if args.command in ("flags", "command"):
+            result: Any = index.flags(args.file) if args.command == "flags" else index.entry(args.file)
+            if result is None:
+                print(f"No entry for {args.file}", file=sys.stderr)
+                return 1
+            if args.json:
+                print(json.dumps(result, indent=2))
+            elif args.command == "flags":
+                print(" ".join(shlex.quote(a) for a in result))
+            else:
+                print(" ".join(shlex.quote(a) for a in result["arguments"]))
+            return 0
+
+        if args.command == "files":
+            argset = args.argset
+            if args.same_flags_as:
+                argset = index.argset_id(args.same_flags_as)
+                if argset is None:
+                    print(f"No entry for {args.same_flags_as}", file=sys.stderr)
+                    return 1
+            result = index.files(args.component, args.directory, argset)
+            print(json.dumps(result, indent=2) if args.json else "\n".join(result))
+            return 0
+
+        result = index.components()
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            for component, count in result.items():
+                print(f"{component}\t{count}")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Content-addressed compiler cache used as CMAKE_<LANG>_COMPILER_LAUNCHER.
+
+CMake runs every C/C++ compile as
+
+    compiler_cache.py [--dir=PATH] <compiler> <arguments...>
+
+The object is looked up under a key made of:
+    - the preprocessed translation unit (compiler -E with the same arguments)
+    - the argument list with output paths, dependency-file options and
+      preprocessor-only options removed
+    - the compiler identity (output of `<compiler> -v`, cached per binary)
+    - the working directory, only when debug info is generated
+
+The dependency file is written by the preprocessing pass, so it is always
+up to date; on a hit only the object (plus its .su stack-usage file and the
+compiler's diagnostics) is restored. Anything that is not a plain
+"-c source -o object" C/C++ compile runs the compiler unchanged.
+
+Entries live in <dir>/<key[:2]>/ and are tracked in <dir>/cache.sqlite,
+which also holds the size limit and hit/miss statistics. When the store
+grows past the limit, least recently used entries are evicted.
+
+Management:
+    compiler_cache.py --show-stats
+    compiler_cache.py --zero-stats
+    compiler_cache.py --max-size 2G
+    compiler_cache.py --clear
+
+Environment:
+    STRATOS_CACHE_DIR       cache directory (default ~/.cache/stratos/compiler)
+    STRATOS_CACHE_MAX_SIZE  size limit used when the store is created (default 2G)
+    STRATOS_CACHE_DISABLE   set to 1 to run the compiler without caching
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_SIZE = "2G"
+
+SOURCE_SUFFIXES = {".c", ".cc", ".cp", ".cpp", ".cxx", ".c++", ".C", ".CPP", ".i", ".ii"}
+
+# Options followed by a separate value argument
+OPTIONS_WITH_VALUE = {
+    "-o", "-x", "-MF", "-MT", "-MQ", "-I", "-D", "-U", "-include", "-imacros",
+    "-isystem", "-iquote", "-idirafter", "-iprefix", "-iwithprefix", "-iwithprefixbefore",
+    "-isysroot", "-Xpreprocessor", "-Xassembler", "-Xlinker", "-aux-info", "--param",
+    "-L", "-l", "-T",
+}
+
+# Options that only influence preprocessing; their effect is already part of the -E output
+PREPROCESSOR_OPTIONS = {
+    "-I", "-D", "-U", "-include", "-imacros", "-isystem", "-iquote", "-idirafter",
+    "-iprefix", "-iwithprefix", "-iwithprefixbefore", "-Xpreprocessor",
+}
+
+# Dependency-file options, replayed by the preprocessing pass
+DEPENDENCY_FLAGS = {"-MD", "-MMD", "-MP"}
+DEPENDENCY_OPTIONS = {"-MF", "-MT", "-MQ"}
+
+# Options producing outputs or side effects the cache does not restore
+UNCACHEABLE_PREFIXES = (
+    "-E", "-S", "-M", "-save-temps", "-fdump-", "-fcallgraph-info", "--coverage",
+    "-ftest-coverage", "-fprofile-", "-fauto-profile", "-Wa,-a", "-fopt-info",
+)
+
+
+def parse_size(text: str) -> int:
+    """Parse '500M', '2G', '1048576' into bytes."""
+    text = text.strip().upper().rstrip("B")
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def default_cache_dir() -> Path:
+    env = os.environ.get("STRATOS_CACHE_DIR")
+    if env:
+        return Path(env)
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    return (Path(base) if base else Path.home() / ".cache") / "stratos" / "compiler"
+
+
+class CompileInvocation:
+    """A compiler command line split into the parts the cache needs."""
+
+    def __init__(self, command: Sequence[str]) -> None:
+        self.compiler = command[0]
+        self.args = list(command[1:])
+        self.source: Optional[str] = None
+        self.output: Optional[str] = None
+        self.reason: Optional[str] = None
+        self.debug_info = False
+        self.stack_usage = False
+        self.key_args: List[str] = []
+        self.preprocess_args: List[str] = []
+        self._parse()
+
+    @property
+    def cacheable(self) -> bool:
+        return self.reason is None
+
+    def _parse(self) -> None:
+        has_compile = False
+        has_dependency = False
+        has_depfile = False
+        has_target = False
+        sources: List[str] = []
+        i = 0
+        while i < len(self.args):
+            arg = self.args[i]
+            value: Optional[str] = None
+            if arg in OPTIONS_WITH_VALUE:
+                if i + 1 >= len(self.args):
+                    self.reason = f"missing value for {arg}"
+                    return
+                value = self.args[i + 1]
+                i += 1
+            i += 1
+
+            if arg == "-c":
+                has_compile = True
+                self.preprocess_args.append("-E")
+                continue
+            if arg == "-o":
+                self.output = value
+                continue
+            if arg in DEPENDENCY_FLAGS or arg in DEPENDENCY_OPTIONS:
+                has_dependency = has_dependency or arg in ("-MD", "-MMD")
+                has_depfile = has_depfile or arg == "-MF"
+                has_target = has_target or arg in ("-MT", "-MQ")
+                self.preprocess_args.extend([arg] if value is None else [arg, value])
+                continue
+            if arg == "-x" and value is not None and not value.startswith(("c", "c++")):
+                self.reason = f"language {value}"
+                return
+            if arg.startswith(UNCACHEABLE_PREFIXES) or arg == "-":
+                self.reason = f"unsupported option {arg}"
+                return
+            if value is None and not arg.startswith("-"):
+                sources.append(arg)
+                continue
+
+            if arg.startswith("-g"):
+                self.debug_info = arg != "-g0"
+            if arg == "-fstack-usage":
+                self.stack_usage = True
+            self.preprocess_args.extend([arg] if value is None else [arg, value])
+            if not self._is_preprocessor_option(arg):
+                self.key_args.extend([arg] if value is None else [arg, value])
+
+        if not has_compile:
+            self.reason = "not a compile (-c) invocation"
+        elif len(sources) != 1:
+            self.reason = f"{len(sources)} input files"
+        elif Path(sources[0]).suffix not in SOURCE_SUFFIXES:
+            self.reason = f"unsupported source {sources[0]}"
+        elif not self.output:
+            self.reason = "no -o output"
+        if self.reason:
+            return
+
+        self.source = sources[0]
+        self.preprocess_args.append(self.source)
+        if has_dependency:
+            # Without -o the preprocessor would name the depfile and its target after the source
+            if not has_depfile:
+                self.preprocess_args.extend(["-MF", os.path.splitext(self.output)[0] + ".d"])
+            if not has_target:
+                self.preprocess_args.extend(["-MQ", self.output])
+
+    @staticmethod
+    def _is_preprocessor_option(arg: str) -> bool:
+        if arg in PREPROCESSOR_OPTIONS:
+            return True
+        return arg.startswith(("-I", "-D", "-U", "-Wp,")) or arg.startswith("-isystem")
+
+    @property
+    def stack_usage_path(self) -> Optional[str]:
+        # GCC names the file after the object with its last suffix replaced
+        if not self.stack_usage or not self.output:
+            return None
+        return os.path.splitext(self.output)[0] + ".su"
+
+
+class CompilerCache:
+    """On-disk object store with an SQLite index, LRU eviction and statistics."""
+
+    SCHEMA_VERSION = "1"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS entries (
+            key       TEXT PRIMARY KEY,
+            size      INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+        CREATE TABLE IF NOT EXISTS stats (
+            name  TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS compilers (
+            stamp    TEXT PRIMARY KEY,
+            identity TEXT NOT NULL
+        );
+    """
+
+    STAT_NAMES = ("hit", "miss", "uncacheable", "compile_failed", "error", "evicted")
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Parallel builds run many launchers at once; let SQLite serialize them
+        self.conn = sqlite3.connect(str(self.cache_dir / "cache.sqlite"), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        with self.conn:
+            if self._get_meta("schema_version") != self.SCHEMA_VERSION:
+                self.conn.execute("DELETE FROM entries")
+                self._set_meta("schema_version", self.SCHEMA_VERSION)
+            if self._get_meta("max_size") is None:
+                self._set_meta("max_size", str(self._env_max_size()))
+
+    @staticmethod
+    def _env_max_size() -> int:
+        text = os.environ.get("STRATOS_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)
+        try:
+            return parse_size(text)
+        except ValueError:
+            print(f"compiler_cache: invalid STRATOS_CACHE_MAX_SIZE '{text}', using {DEFAULT_MAX_SIZE}",
+                  file=sys.stderr)
+            return parse_size(DEFAULT_MAX_SIZE)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -------------------------------------------------------------------------
+    # Metadata and statistics
+    # -------------------------------------------------------------------------
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def max_size(self) -> int:
+        return int(self._get_meta("max_size") or parse_size(DEFAULT_MAX_SIZE))
+
+    def set_max_size(self, size: int) -> None:
+        with self.conn:
+            self._set_meta("max_size", str(size))
+        self.evict()
+
+    def bump(self, name: str, amount: int = 1) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO stats(name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount))
+
+    def stats(self) -> Dict[str, int]:
+        result = {name: 0 for name in self.STAT_NAMES}
+        result.update(dict(self.conn.execute("SELECT name, value FROM stats").fetchall()))
+        count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        result["entries"] = count
+        result["size"] = size
+        result["max_size"] = self.max_size
+        return result
+
+    def zero_stats(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM stats")
+
+    def clear(self) -> None:
+        with self.conn:
+            keys = [row[0] for row in self.conn.execute("SELECT key FROM entries")]
+            self.conn.execute("DELETE FROM entries")
+        for key in keys:
+            self._remove_files(key)
+
+    # -------------------------------------------------------------------------
+    # Keys
+    # -------------------------------------------------------------------------
+    def compiler_identity(self, compiler: str) -> str:
+        """`compiler -v` output, cached per (path, size, mtime) of the compiler binary."""
+        resolved = shutil.which(compiler) or compiler
+        st = os.stat(resolved)
+        stamp = f"{os.path.realpath(resolved)}|{st.st_size}|{st.st_mtime_ns}"
+        row = self.conn.execute("SELECT identity FROM compilers WHERE stamp = ?", (stamp,)).fetchone()
+        if row:
+            return row[0]
+        result = subprocess.run([compiler, "-v"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        identity = hashlib.sha256(result.stdout).hexdigest()
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO compilers(stamp, identity) VALUES (?, ?)",
+                              (stamp, identity))
+        return identity
+
+    def compute_key(self, invocation: CompileInvocation, preprocessed: bytes) -> str:
+        h = hashlib.sha256()
+        h.update(self.compiler_identity(invocation.compiler).encode())
+        h.update(b"\0args\0")
+        h.update("\0".join(invocation.key_args).encode())
+        if invocation.debug_info:
+            # Debug info records the compilation directory
+            h.update(b"\0cwd\0")
+            h.update(os.getcwd().encode())
+        h.update(b"\0source\0")
+        h.update(preprocessed)
+        return h.hexdigest()
+
+    # -------------------------------------------------------------------------
+    # Store
+    # -------------------------------------------------------------------------
+    def _entry_path(self, key: str, kind: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.{kind}"
+
+    def _remove_files(self, key: str) -> None:
+        for kind in ("o", "su", "stderr"):
+            try:
+                self._entry_path(key, kind).unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def lookup(self, key: str, invocation: CompileInvocation) -> Optional[bytes]:
+        """Restore the outputs of `key`; return the recorded diagnostics, or None on a miss."""
+        row = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            object_data = self._entry_path(key, "o").read_bytes()
+            stack_usage = invocation.stack_usage_path
+            stack_data = self._entry_path(key, "su").read_bytes() if stack_usage else None
+            stderr_path = self._entry_path(key, "stderr")
+            diagnostics = stderr_path.read_bytes() if stderr_path.is_file() else b""
+        except FileNotFoundError:
+            # Evicted by a concurrent launcher or removed by hand
+            with self.conn:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+
+        self._write_atomic(Path(invocation.output), object_data)
+        if stack_usage and stack_data is not None:
+            self._write_atomic(Path(stack_usage), stack_data)
+        with self.conn:
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return diagnostics
+
+    def store(self, key: str, invocation: CompileInvocation, diagnostics: bytes) -> None:
+        object_data = Path(invocation.output).read_bytes()
+        size = len(object_data) + len(diagnostics)
+        self._write_atomic(self._entry_path(key, "o"), object_data)
+        if invocation.stack_usage_path and os.path.isfile(invocation.stack_usage_path):
+            stack_data = Path(invocation.stack_usage_path).read_bytes()
+            self._write_atomic(self._entry_path(key, "su"), stack_data)
+            size += len(stack_data)
+        if diagnostics:
+            self._write_atomic(self._entry_path(key, "stderr"), diagnostics)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO entries(key, size, last_used) VALUES (?, ?, ?)",
+                              (key, size, time.time()))
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the store is below 90% of the limit."""
+        limit = self.max_size
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= limit:
+            return 0
+        target = int(limit * 0.9)
+        victims: List[str] = []
+        with self.conn:
+            for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                if total <= target:
+                    break
+                victims.append(key)
+                total -= size
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+        for key in victims:
+            self._remove_files(key)
+        if victims:
+            self.bump("evicted", len(victims))
+        return len(victims)
+
+
+# -----------------------------------------------------------------------------
+# Launcher
+# -----------------------------------------------------------------------------
+def run_compiler(command: Sequence[str]) -> int:
+    return subprocess.run(list(command)).returncode
+
+
+def run_cached(cache: CompilerCache, command: Sequence[str]) -> int:
+    invocation = CompileInvocation(command)
+    if not invocation.cacheable:
+        cache.bump("uncacheable")
+        return run_compiler(command)
+
+    preprocess = subprocess.run([invocation.compiler] + invocation.preprocess_args,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if preprocess.returncode != 0:
+        # Let the real compile report the error with its usual output
+        cache.bump("compile_failed")
+        return run_compiler(command)
+
+    key = cache.compute_key(invocation, preprocess.stdout)
+    diagnostics = cache.lookup(key, invocation)
+    if diagnostics is not None:
+        cache.bump("hit")
+        sys.stderr.buffer.write(diagnostics)
+        sys.stderr.flush()
+        return 0
+
+    cache.bump("miss")
+    result = subprocess.run(list(command), stderr=subprocess.PIPE)
+    sys.stderr.buffer.write(result.stderr)
+    sys.stderr.flush()
+    if result.returncode != 0:
+        cache.bump("compile_failed")
+        return result.returncode
+    try:
+        cache.store(key, invocation, result.stderr)
+    except (OSError, sqlite3.Error) as e:
+        # The object is already built; a failed store only loses this entry
+        print(f"compiler_cache: could not store result ({e})", file=sys.stderr)
+        try:
+            cache.bump("error")
+        except sqlite3.Error:
+            pass
+    return 0
+
+
+def print_stats(cache: CompilerCache) -> None:
+    stats = cache.stats()
+    lookups = stats["hit"] + stats["miss"]
+    rate = stats["hit"] / lookups * 100 if lookups else 0.0
+    print(f"Cache directory      {cache.cache_dir}")
+    print(f"Hits                 {stats['hit']}")
+    print(f"Misses               {stats['miss']}")
+    print(f"Hit rate             {rate:.1f}%")
+    print(f"Uncacheable          {stats['uncacheable']}")
+    print(f"Compile failures     {stats['compile_failed']}")
+    print(f"Internal errors      {stats['error']}")
+    print(f"Evicted entries      {stats['evicted']}")
+    print(f"Entries              {stats['entries']}")
+    print(f"Size                 {format_size(stats['size'])} / {format_size(stats['max_size'])}")
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def split_argv(argv: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """Leading --options belong to the cache, the rest is the compiler command."""
+    i = 0
+    while i < len(argv) and argv[i].startswith("--"):
+        i += 2 if argv[i] in ("--dir", "--max-size") else 1
+    return list(argv[:i]), list(argv[i:])
+
+
+def main() -> int:
+    own_args, command = split_argv(sys.argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Compiler cache launcher: compiler_cache.py [options] <compiler> <args...>")
+    parser.add_argument("--dir", type=str, help="Cache directory (default $STRATOS_CACHE_DIR or ~/.cache/stratos/compiler)")
+    parser.add_argument("--show-stats", action="store_true", help="Print hit/miss statistics")
+    parser.add_argument("--zero-stats", action="store_true", help="Reset statistics")
+    parser.add_argument("--max-size", type=str, help="Set the size limit, e.g. 500M or 2G")
+    parser.add_argument("--clear", action="store_true", help="Remove all cached objects")
+    args = parser.parse_args(own_args)
+
+    if command and os.environ.get("STRATOS_CACHE_DISABLE") == "1":
+        return run_compiler(command)
+
+    cache_dir = Path(args.dir) if args.dir else default_cache_dir()
+    try:
+        cache = CompilerCache(cache_dir)
+    except (OSError, sqlite3.Error) as e:
+        if not command:
+            print(f"Cannot open cache {cache_dir}: {e}", file=sys.stderr)
+            return 1
+        print(f"compiler_cache: cache unavailable ({e}), compiling directly", file=sys.stderr)
+        return run_compiler(command)
+
+    try:
+        if not command:
+            if args.clear:
+                cache.clear()
+                print(f"Cleared {cache_dir}")
+            if args.max_size:
+                try:
+                    cache.set_max_size(parse_size(args.max_size))
+                except ValueError:
+                    parser.error(f"invalid --max-size '{args.max_size}', expected e.g. 500M or 2G")
+            if args.zero_stats:
+                cache.zero_stats()
+            if args.show_stats or not (args.clear or args.max_size or args.zero_stats):
+                print_stats(cache)
+            return 0
+
+        try:
+            return run_cached(cache, command)
+        except (OSError, sqlite3.Error) as e:
+            # A broken cache must never break the build
+            print(f"compiler_cache: {e}, compiling directly", file=sys.stderr)
+            try:
+                cache.bump("error")
+            except sqlite3.Error:
+                pass
+            return run_compiler(command)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@
 Filter out assembler file entries from CMake's compile_commands.json.
 
 Usage:
-    filter_compile_commands.py [--output-dir OUTPUT_DIR]
+    filter_compile_commands.py [--output-dir OUTPUT_DIR] [--no-index]
 
 If --output-dir is provided, the filtered compile_commands.json is written to that
 directory (the file name is always compile_commands.json). Otherwise, the original
@@ -12,15 +12,21 @@ file is overwritten in place.
 The script automatically locates the project root by looking for a 'scripts'
 directory, and expects the original compile_commands.json to be in the 'build'
 subdirectory of the project root.
+
+The filtered entries are also recorded in a persistent SQLite index
+(build/compile_commands.index.sqlite, see compile_db_index.py) so that tools can
+look up flags without parsing the whole database. Use --no-index to skip it.
 """
 
+import hashlib
 import json
 import os
-import sys
 import argparse
 from pathlib import Path
 from typing import List, Dict, Any
 
+from compile_db_index import CompilationDatabaseIndex
+
 
 class CompilationDatabaseFilter:
     """Filter out assembler entries from a CMake compile_commands.json file."""
@@ -34,6 +40,7 @@ class CompilationDatabaseFilter:
         self.project_root = self._find_project_root()
         self.build_dir = self.project_root / "build"
         self.source_db_path = self.build_dir / "compile_commands.json"
+        self.index_path = self.build_dir / "compile_commands.index.sqlite"
 
     def _find_project_root(self) -> Path:
         current = self.start_path
@@ -83,7 +90,17 @@ class CompilationDatabaseFilter:
         os.replace(temp_path, output_path)
         print(f"Filtered compile_commands.json written to {output_path}")
 
-    def run(self, output_dir: Path = None) -> None:
+    def update_index(self, entries: List[Dict[str, Any]]) -> None:
+        """Incrementally update the SQLite index with the filtered entries."""
+        source_hash = hashlib.sha256(self.source_db_path.read_bytes()).hexdigest()
+        index = CompilationDatabaseIndex(self.index_path, self.project_root)
+        try:
+            changed, removed, unchanged = index.update(entries, source_hash)
+        finally:
+            index.close()
+        print(f"Index {self.index_path}: {changed} changed, {removed} removed, {unchanged} unchanged.")
+
+    def run(self, output_dir: Path = None, update_index: bool = True) -> None:
         """
         Execute filtering. If output_dir is provided, write the filtered database
         to output_dir/compile_commands.json; otherwise overwrite the original.
@@ -101,6 +118,9 @@ class CompilationDatabaseFilter:
         print(f"Removed {removed_count} assembler file entries.")
         print(f"Keeping {filtered_count} entries.")
 
+        if update_index:
+            self.update_index(filtered)
+
         if removed_count == 0:
             print("No assembler entries found. Nothing to do.")
             return
@@ -124,12 +144,17 @@ def main():
         help="Directory where the filtered compile_commands.json will be written. "
              "If not specified, the original file is overwritten."
     )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Do not update the SQLite index of the compilation database."
+    )
     args = parser.parse_args()
 
     output_dir = Path(args.output_dir) if args.output_dir else None
 
     filter_tool = CompilationDatabaseFilter()
-    filter_tool.run(output_dir=output_dir)
+    filter_tool.run(output_dir=output_dir, update_index=not args.no_index)
 
 
 if __name__ == "__main__":
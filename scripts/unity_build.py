@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Unity-build grouping for C sources with symbol-collision detection.
+
+Merging several .c files into one translation unit changes their meaning when
+they share file-scope names or leak macros into each other. Before grouping,
+every source is scanned (comments and strings stripped, no preprocessing) for:
+
+    - file-local names: static functions/variables, enumerators, typedef names
+      and struct/union/enum tags defined in the .c file
+    - all file-scope names it declares or defines
+    - macros still defined at the end of the file, and their bodies
+    - every identifier it uses
+
+Two files conflict when a local name of one is a file-scope name of the other,
+or a macro leaked by one is used by the other (unless both define it
+identically). A file that #defines a macro before an #include may be
+configuring that header, which a unity batch cannot honour once the header has
+been included by an earlier file, so such files always build alone.
+
+Sources are assigned largest first to the lightest batch that holds no
+conflicting file (--on-conflict separate), or the most conflicting files are
+left out of the unity build until the rest are compatible (--on-conflict
+exclude). Sources that fit no batch build alone.
+
+The result is a CMake script that sets UNITY_GROUP on the batched sources and
+SKIP_UNITY_BUILD_INCLUSION on the others; configure_unity_build() in
+cmake/os_util.cmake includes it and turns on UNITY_BUILD_MODE GROUP.
+
+Usage:
+    unity_build.py --output build/unity/OS_INTERNAL_SRC.cmake [--batches 4]
+                   [--group-prefix vendor] [--on-conflict separate|exclude] [--json] SOURCES...
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<number>\d[\w.]*)
+  | (?P<punct>\S)
+""", re.VERBOSE | re.DOTALL)
+
+DIRECTIVE = re.compile(r"^\s*#\s*(\w+)\s*(.*)$")
+DEFINE = re.compile(r"^([A-Za-z_]\w*)(\([^)]*\))?\s*(.*)$")
+
+TAG_KEYWORDS = {"struct", "union", "enum"}
+QUALIFIERS = {"static", "extern", "const", "volatile", "inline", "__inline", "register",
+              "typedef", "signed", "unsigned", "struct", "union", "enum", "__I", "__O", "__IO",
+              "__attribute__", "__asm", "__ASM", "__INLINE", "__STATIC_INLINE"}
+
+
+class SourceInfo:
+    """What one C source contributes to, and depends on from, a shared translation unit."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.size = 0
+        self.locals: Set[str] = set()        # names that must stay private to this file
+        self.scope_names: Set[str] = set()   # every file-scope name declared or defined
+        self.macros: Dict[str, str] = {}     # macros still defined at end of file -> body
+        self.identifiers: Set[str] = set()   # every identifier token, including in directives
+        self.configures_headers: List[str] = []  # macros #defined before a later #include
+
+    # -------------------------------------------------------------------------
+    # Scanning
+    # -------------------------------------------------------------------------
+    def scan(self) -> "SourceInfo":
+        text = self.path.read_text(encoding="utf-8", errors="replace")
+        self.size = len(text.encode("utf-8"))
+        text = re.sub(r"\\\r?\n", " ", text)
+        # Blank out comments and strings but keep the line structure for directives
+        text = TOKEN.sub(self._strip, text)
+
+        code_lines: List[str] = []
+        pending_defines: List[str] = []
+        for line in text.splitlines():
+            directive = DIRECTIVE.match(line)
+            if not directive:
+                code_lines.append(line)
+                continue
+            name, rest = directive.groups()
+            self.identifiers.update(re.findall(r"[A-Za-z_]\w*", rest))
+            if name == "define":
+                match = DEFINE.match(rest)
+                if match:
+                    macro = match.group(1)
+                    self.macros[macro] = " ".join(((match.group(2) or "") + " " + match.group(3)).split())
+                    pending_defines.append(macro)
+            elif name == "undef":
+                macro = rest.split()[0] if rest.split() else ""
+                self.macros.pop(macro, None)
+                if macro in pending_defines:
+                    pending_defines.remove(macro)
+            elif name == "include":
+                self.configures_headers.extend(m for m in pending_defines if m not in self.configures_headers)
+                pending_defines = []
+        self._scan_declarations(" ".join(code_lines))
+        return self
+
+    @staticmethod
+    def _strip(match: "re.Match[str]") -> str:
+        if match.group("comment"):
+            return "\n" * match.group(0).count("\n") or " "
+        if match.group("string"):
+            return '""'
+        return match.group(0)
+
+    def _scan_declarations(self, code: str) -> None:
+        tokens = [m.group(0) for m in TOKEN.finditer(code) if not m.group("comment")]
+        self.identifiers.update(t for t in tokens if re.match(r"[A-Za-z_]", t))
+        statement: List[str] = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token == ";":
+                self._declaration(statement, has_body=False)
+                statement = []
+            elif token == "{":
+                end = self._matching_brace(tokens, i)
+                body = tokens[i + 1:end]
+                is_aggregate = "=" in statement or any(t in TAG_KEYWORDS for t in statement)
+                if is_aggregate:
+                    if statement and statement[-2:-1] and statement[-2] in TAG_KEYWORDS:
+                        tag = statement[-1]
+                        self._add(f"{statement[-2]} {tag}", local=True)
+                    if "enum" in statement and "=" not in statement:
+                        self._enumerators(body)
+                    statement.append("{}")
+                else:
+                    # Function definition
+                    self._declaration(statement, has_body=True)
+                    statement = []
+                i = end
+            else:
+                statement.append(token)
+            i += 1
+
+    @staticmethod
+    def _matching_brace(tokens: List[str], start: int) -> int:
+        depth = 0
+        for j in range(start, len(tokens)):
+            if tokens[j] == "{":
+                depth += 1
+            elif tokens[j] == "}":
+                depth -= 1
+                if depth == 0:
+                    return j
+        return len(tokens) - 1
+
+    def _enumerators(self, body: List[str]) -> None:
+        expect_name = True
+        depth = 0
+        for token in body:
+            if token in "([":
+                depth += 1
+            elif token in ")]":
+                depth -= 1
+            elif token == "," and depth == 0:
+                expect_name = True
+            elif expect_name and re.match(r"[A-Za-z_]", token):
+                self._add(token, local=True)
+                expect_name = False
+
+    def _add(self, name: str, local: bool) -> None:
+        self.scope_names.add(name)
+        if local:
+            self.locals.add(name)
+
+    def _declaration(self, statement: List[str], has_body: bool) -> None:
+        if not statement:
+            return
+        if statement[0] == "typedef":
+            names = [t for t in statement if re.match(r"[A-Za-z_]\w*$", t)]
+            if names:
+                self._add(names[-1], local=True)
+            return
+        if statement[0] in TAG_KEYWORDS and len(statement) >= 2 and statement[-1] == "{}":
+            return  # plain "struct tag { ... };", tag already recorded
+        is_static = "static" in statement[:statement.index("(")] if "(" in statement else "static" in statement
+        for name in self._declarator_names(statement):
+            self._add(name, local=is_static)
+
+    @staticmethod
+    def _declarator_names(statement: List[str]) -> List[str]:
+        """Declared names of 'static int a[2] = {..}, *b;' or 'void f(int x)'."""
+        names: List[str] = []
+        declarator: List[str] = []
+        depth = 0
+        in_initializer = False
+
+        def finish() -> None:
+            name = SourceInfo._declarator_name(declarator)
+            if name:
+                names.append(name)
+
+        for token in statement:
+            if token in "([":
+                depth += 1
+            elif token in ")]":
+                depth -= 1
+            if depth == 0 and token == "=":
+                in_initializer = True
+                continue
+            if depth == 0 and token == ",":
+                finish()
+                declarator = []
+                in_initializer = False
+                continue
+            if not in_initializer:
+                declarator.append(token)
+        finish()
+        return names
+
+    @staticmethod
+    def _declarator_name(tokens: List[str]) -> Optional[str]:
+        # Function pointer "(*name)(...)": the name follows "(*"
+        for j in range(len(tokens) - 2):
+            if tokens[j] == "(" and tokens[j + 1] == "*" and re.match(r"[A-Za-z_]", tokens[j + 2]):
+                return tokens[j + 2]
+        depth = 0
+        candidate = None
+        for token in tokens:
+            if token == "(" and depth == 0:
+                # Function declarator: the identifier right before the parameter list
+                return candidate
+            if token in "([":
+                depth += 1
+            elif token in ")]":
+                depth -= 1
+            elif depth == 0 and re.match(r"[A-Za-z_]\w*$", token) and token not in QUALIFIERS:
+                candidate = token
+        return candidate
+
+
+# -----------------------------------------------------------------------------
+# Grouping
+# -----------------------------------------------------------------------------
+def conflict_reasons(a: SourceInfo, b: SourceInfo) -> List[str]:
+    reasons: List[str] = []
+    for first, second in ((a, b), (b, a)):
+        for name in sorted(first.locals & second.scope_names):
+            reasons.append(f"'{name}' is file-local in {first.path.name} and declared in {second.path.name}")
+        for macro in sorted(set(first.macros) & second.identifiers):
+            if second.macros.get(macro) == first.macros[macro]:
+                continue
+            reasons.append(f"macro '{macro}' from {first.path.name} leaks into {second.path.name}")
+    return sorted(set(reasons))
+
+
+class UnityPlanner:
+    """Scan sources, find conflicts and pack the rest into size-balanced batches."""
+
+    def __init__(self, sources: List[Path], batches: int, on_conflict: str) -> None:
+        self.infos = [SourceInfo(p).scan() for p in sources]
+        self.batch_count = max(1, batches)
+        self.on_conflict = on_conflict
+        self.conflicts: Dict[Tuple[int, int], List[str]] = {}
+        self.standalone: Dict[Path, str] = {}
+        self.batches: List[List[SourceInfo]] = []
+
+    def find_conflicts(self) -> None:
+        for i, a in enumerate(self.infos):
+            for j in range(i + 1, len(self.infos)):
+                reasons = conflict_reasons(a, self.infos[j])
+                if reasons:
+                    self.conflicts[(i, j)] = reasons
+
+    def plan(self) -> None:
+        self.find_conflicts()
+        neighbours: Dict[int, Set[int]] = {i: set() for i in range(len(self.infos))}
+        for i, j in self.conflicts:
+            neighbours[i].add(j)
+            neighbours[j].add(i)
+
+        candidates = []
+        for index, info in enumerate(self.infos):
+            if info.configures_headers:
+                self.standalone[info.path] = (f"#defines {', '.join(info.configures_headers[:3])}"
+                                              f" before an #include")
+            else:
+                candidates.append(index)
+
+        if self.on_conflict == "exclude":
+            # Drop the most conflicting file until the remaining ones are pairwise compatible
+            remaining = set(candidates)
+            while True:
+                degree = {i: len(neighbours[i] & remaining) for i in remaining}
+                worst = max(remaining, key=lambda i: (degree[i], str(self.infos[i].path)), default=None)
+                if worst is None or degree[worst] == 0:
+                    break
+                others = ", ".join(sorted(self.infos[n].path.name for n in neighbours[worst] & remaining))
+                self.standalone[self.infos[worst].path] = f"conflicts with {others}"
+                remaining.discard(worst)
+            candidates = sorted(remaining)
+
+        # Largest first into the lightest batch without a conflicting member
+        self.batches = [[] for _ in range(self.batch_count)]
+        members: List[Set[int]] = [set() for _ in range(self.batch_count)]
+        loads = [0] * self.batch_count
+        for index in sorted(candidates, key=lambda k: (-self.infos[k].size, str(self.infos[k].path))):
+            order = sorted(range(self.batch_count), key=lambda b: (loads[b], b))
+            target = next((b for b in order if not (members[b] & neighbours[index])), None)
+            if target is None:
+                self.standalone[self.infos[index].path] = "conflicts with a file in every batch"
+                continue
+            self.batches[target].append(self.infos[index])
+            members[target].add(index)
+            loads[target] += self.infos[index].size
+
+        # A batch of one file is just that file
+        for batch in self.batches:
+            if len(batch) == 1:
+                self.standalone[batch[0].path] = "alone in its batch"
+                batch.clear()
+        self.batches = [sorted(b, key=lambda s: str(s.path)) for b in self.batches if b]
+
+    # -------------------------------------------------------------------------
+    # Output
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def cmake_path(path: Path) -> str:
+        return path.resolve().as_posix()
+
+    def cmake_script(self, group_prefix: str) -> str:
+        lines = ["# Generated by scripts/unity_build.py, do not edit.", ""]
+        for index, batch in enumerate(self.batches):
+            lines.append("set_source_files_properties(")
+            lines.extend(f'    "{self.cmake_path(s.path)}"' for s in batch)
+            lines.append(f'    PROPERTIES UNITY_GROUP "{group_prefix}_{index}"')
+            lines.append(")")
+        if self.standalone:
+            lines.append("set_source_files_properties(")
+            lines.extend(f'    "{self.cmake_path(p)}"' for p in sorted(self.standalone))
+            lines.append("    PROPERTIES SKIP_UNITY_BUILD_INCLUSION ON")
+            lines.append(")")
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> List[str]:
+        lines = [f"{len(self.infos)} sources, {len(self.batches)} unity batches, "
+                 f"{len(self.standalone)} standalone"]
+        for index, batch in enumerate(self.batches):
+            size = sum(s.size for s in batch)
+            lines.append(f"batch {index}: {len(batch)} files, {size / 1024:.1f} KiB: "
+                         + ", ".join(s.path.name for s in batch))
+        for path, reason in sorted(self.standalone.items()):
+            lines.append(f"standalone {path.name}: {reason}")
+        for (i, j), reasons in sorted(self.conflicts.items()):
+            lines.append(f"conflict {self.infos[i].path.name} <-> {self.infos[j].path.name}: {reasons[0]}"
+                         + (f" (+{len(reasons) - 1} more)" if len(reasons) > 1 else ""))
+        return lines
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "batches": [[str(s.path) for s in batch] for batch in self.batches],
+            "standalone": {str(p): reason for p, reason in sorted(self.standalone.items())},
+            "conflicts": [{"files": [str(self.infos[i].path), str(self.infos[j].path)], "reasons": reasons}
+                          for (i, j), reasons in sorted(self.conflicts.items())],
+        }
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Keep the timestamp of an unchanged script so CMake does not reconfigure."""
+    if path.is_file() and path.read_text(encoding="utf-8") == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Group C sources into conflict-free, size-balanced unity batches")
+    parser.add_argument("sources", nargs="+", help="C source files")
+    parser.add_argument("--output", type=str, help="CMake script to write (UNITY_GROUP properties)")
+    parser.add_argument("--batches", type=int, default=4, help="Number of unity translation units")
+    parser.add_argument("--group-prefix", type=str, default="unity", help="UNITY_GROUP name prefix")
+    parser.add_argument("--on-conflict", choices=("separate", "exclude"), default="separate",
+                        help="Keep conflicting files in different batches, or build them standalone")
+    parser.add_argument("--json", action="store_true", help="Print the plan as JSON instead of a report")
+    args = parser.parse_args()
+
+    sources = [Path(s) for s in args.sources if s.endswith(".c")]
+    missing = [s for s in sources if not s.is_file()]
+    if missing:
+        print(f"Source not found: {missing[0]}", file=sys.stderr)
+        return 1
+
+    planner = UnityPlanner(sources, args.batches, args.on_conflict)
+    planner.plan()
+
+    if args.json:
+        print(json.dumps(planner.to_dict(), indent=2))
+    else:
+        print("\n".join(planner.report()))
+    if args.output:
+        changed = write_if_changed(Path(args.output), planner.cmake_script(args.group_prefix))
+        if not args.json:
+            print(f"{'Wrote' if changed else 'Up to date'}: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
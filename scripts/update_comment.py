@@ -9,6 +9,12 @@ import os
 import json
 import datetime
 import sys
+import argparse
+import ctypes
+import ctypes.util
+import select
+import struct
+import time
 from pathlib import Path
 
 class FileCommentUpdater:
@@ -26,6 +32,9 @@ class FileCommentUpdater:
             '.cmake': ('#', '#'),
             '.md': ('#', '#')
         }
+        
+        # Content hash of the last write made by this script, per file
+        self.own_writes = {}
 
     def load_config(self, config_file):
         """Load configuration file"""
@@ -256,6 +265,15 @@ class FileCommentUpdater:
                 return 0, end_line
             return 0, 0
 
+        # Python header template starts with a shebang, skip it before matching
+        if file_ext == '.py' and first_line.startswith('#!'):
+            _, e = self.interval('\n'.join(lines[1:]), file_ext)
+            return 0, e + 1
+
+        # No leading comment block, nothing to replace
+        if not first_line.startswith(s_sym):
+            return 0, 0
+
         # For C and Python files, use stack matching
         stack = []
 
@@ -310,12 +328,31 @@ class FileCommentUpdater:
 
         return 0, e + 1
 
+    def is_excluded_dir(self, rel_dir):
+        """Determine if a directory (relative to root) is excluded by configuration"""
+        rel_dir = Path(rel_dir)
+        rel_posix = rel_dir.as_posix()
+        # Version control metadata is never scanned or watched, whatever the configuration says
+        if ".git" in rel_dir.parts:
+            return True
+        for excluded in self.config["exclude_dirs"]:
+            if '/' in excluded:
+                # Path-style entries such as "user/libraries" match a subtree
+                if rel_posix == excluded or rel_posix.startswith(excluded + '/'):
+                    return True
+            elif excluded in rel_dir.parts:
+                return True
+        return False
+
     def should_process_file(self, file_path):
         """Determine if the file should be processed"""
         # Check if in excluded directories
-        for part in file_path.parts:
-            if part in self.config["exclude_dirs"]:
-                return False
+        try:
+            rel_path = file_path.relative_to(self.root_dir)
+        except ValueError:
+            rel_path = file_path
+        if self.is_excluded_dir(rel_path.parent):
+            return False
         
         # Check if excluded file
         if file_path.name in self.config["exclude_files"]:
@@ -375,18 +412,25 @@ class FileCommentUpdater:
                 else:
                     new_content = new_comment + remaining_content
                     
-                print(f"  └── Replaced comment (lines 1-{e})")
+                action = f"Replaced comment (lines 1-{e})"
             else:
                 # Insert new comment
                 if content and not content.startswith('\n'):
                     new_content = new_comment + '\n' + content
                 else:
                     new_content = new_comment + content
-                print(f"  └── Added new comment")
+                action = "Added new comment"
+            
+            # Leave up-to-date files untouched (no mtime churn, no editor reload)
+            if new_content == content:
+                print(f"  └── Comment up to date")
+                return True
             
             # Write to file
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(new_content)
+            self.own_writes[file_path] = hash(new_content)
+            print(f"  └── {action}")
             
             return True
             
@@ -414,7 +458,208 @@ class FileCommentUpdater:
         else:
             self.print_warning(f"Processing completed with issues. Updated {success_count}/{len(files_to_process)} files")
 
+class InotifyBackend:
+    """Linux inotify backend (via libc), watches every non-excluded directory"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, updater):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.updater = updater
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.overflowed = False
+        self.add_tree(self.updater.root_dir)
+
+    def add_tree(self, directory):
+        """Add watches for a directory and all of its non-excluded subdirectories"""
+        for current, dirs, _ in os.walk(directory):
+            current = Path(current)
+            dirs[:] = [d for d in dirs if not self.updater.is_excluded_dir((current / d).relative_to(self.updater.root_dir))]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(current)), self.WATCH_MASK)
+            if wd < 0:
+                self.updater.print_warning(f"Cannot watch {current}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self.watches[wd] = current
+
+    def fileno(self):
+        return self.fd
+
+    def wait(self, timeout):
+        """Block until events are available or timeout expires"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(readable)
+
+    def read_changes(self):
+        """Drain pending events, return the set of changed file paths"""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                if mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if mask & self.IN_ISDIR:
+                    # New (or moved in) directory: watch it and check its files
+                    if (mask & (self.IN_CREATE | self.IN_MOVED_TO)) and \
+                            not self.updater.is_excluded_dir(path.relative_to(self.updater.root_dir)):
+                        self.add_tree(path)
+                        changed.update(p for p in path.rglob('*') if p.is_file())
+                    continue
+                if mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Portable fallback: compare (mtime, size) of files in non-excluded directories"""
+
+    def __init__(self, updater, interval=1.0):
+        self.updater = updater
+        self.interval = interval
+        self.overflowed = False
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for current, dirs, files in os.walk(self.updater.root_dir):
+            current = Path(current)
+            dirs[:] = [d for d in dirs if not self.updater.is_excluded_dir((current / d).relative_to(self.updater.root_dir))]
+            for name in files:
+                path = current / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        return True
+
+    def read_changes(self):
+        snapshot = self.take_snapshot()
+        changed = {p for p, sig in snapshot.items() if self.snapshot.get(p) != sig}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class CommentWatcher:
+    """Keep file headers up to date by re-checking only files that change"""
+
+    def __init__(self, updater, debounce=0.3, force_polling=False, poll_interval=1.0):
+        self.updater = updater
+        self.debounce = debounce
+        self.backend = None
+        if not force_polling:
+            try:
+                self.backend = InotifyBackend(updater)
+                print(f"Watching {len(self.backend.watches)} directories with inotify")
+            except (OSError, AttributeError) as e:
+                updater.print_warning(f"inotify unavailable ({e}), falling back to polling")
+        if self.backend is None:
+            self.backend = PollingBackend(updater, poll_interval)
+            print(f"Watching {len(self.backend.snapshot)} files by polling every {poll_interval}s")
+
+    def is_own_write(self, file_path):
+        """True if the file still holds exactly what this script last wrote"""
+        expected = self.updater.own_writes.get(file_path)
+        if expected is None:
+            return False
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return hash(f.read()) == expected
+        except (OSError, UnicodeDecodeError):
+            return False
+
+    def handle_changes(self, paths):
+        for file_path in sorted(paths):
+            if not file_path.is_file() or not self.updater.should_process_file(file_path):
+                continue
+            if self.is_own_write(file_path):
+                continue
+            print(f"Processing: {file_path.relative_to(self.updater.root_dir)}")
+            self.updater.update_file_comments(file_path)
+
+    def run(self):
+        print("Press Ctrl+C to stop")
+        pending = set()
+        try:
+            while True:
+                # Wait indefinitely for the first event, then until the burst settles
+                timeout = self.debounce if pending else None
+                if self.backend.wait(timeout):
+                    changes = self.backend.read_changes()
+                    if self.backend.overflowed:
+                        # Events were lost, fall back to a one-off full pass
+                        self.backend.overflowed = False
+                        self.updater.print_warning("Event queue overflowed, rescanning project")
+                        changes |= set(self.updater.find_files_to_process())
+                    if changes:
+                        pending |= changes
+                        continue
+                if pending:
+                    batch, pending = pending, set()
+                    self.handle_changes(batch)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+        finally:
+            self.backend.close()
+
 def main():
+    parser = argparse.ArgumentParser(description="Add or update standard comment headers for project files")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and update headers of files as they are saved")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="Seconds without new events before a burst of saves is processed (default: 0.3)")
+    parser.add_argument("--poll", action="store_true",
+                        help="Use polling instead of inotify in watch mode")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Polling interval in seconds (default: 1.0)")
+    args = parser.parse_args()
+
     # Set project root directory (current directory)
     project_root = os.getcwd()
     
@@ -424,6 +669,11 @@ def main():
     # Create updater instance
     updater = FileCommentUpdater(project_root, config_file)
     
+    if args.watch:
+        # Only files that change are re-checked, no initial full pass
+        CommentWatcher(updater, args.debounce, args.poll, args.poll_interval).run()
+        return
+    
     # Execute processing
     updater.process_all_files()
 
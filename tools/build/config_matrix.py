@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+config_matrix.py
+
+Configures and builds every combination of memory model, build type and board
+overrides in its own build directory, in parallel, and compares the resulting
+flash/RAM usage and build times in one table.
+
+Every variant is configured with OS_ISOLATED_BUILD=ON, so the generated linker
+script and memory_layout.hpp go into the variant's build directory and the
+builds do not race on the source tree. All variants share one compiler cache
+(scripts/compiler_cache.py), so sources that do not depend on the variant,
+such as CMSIS and the StdPeriph drivers, are compiled once. Variants are built
+with ENABLE_UNITY_BUILD=OFF: unity sources are written into each variant's
+build directory, and that path ends up in the preprocessed line markers the
+cache key is computed from, so merged vendor batches could never be shared.
+
+Memory models whose linker script has no SECTIONS command yet (currently
+dynamic and mixture) are reported as skipped instead of being built.
+
+Usage:
+    python tools/build/config_matrix.py
+    python tools/build/config_matrix.py --model static mixture dynamic --build-type MinSizeRel Debug
+    python tools/build/config_matrix.py --set _USER_POOL_SIZE_=0x1800,0x2000 --set _KERNEL_POOL_SIZE_=0x800,0x1000
+        [--jobs 2] [--build-jobs 4] [--sort flash] [--json report.json] [--clean]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MEMORY_MODELS = ("static", "mixture", "dynamic")
+LINKER_DIR = Path("os_linker") / "stm32_f10x"
+# The static script is generated from this template at configure time
+STATIC_TEMPLATE = Path("os_linker") / "template" / "stm32_f10x" / "STM32F103md_static_in.ld"
+
+# "   FLASH:  1234 B  64 KB  1.88%" lines printed by -Wl,--print-memory-usage
+MEMORY_USAGE_LINE = re.compile(r"^\s*(\w+):\s+(\d+)\s+(\S?B)\s+(\d+)\s+(\S?B)\s+([\d.]+)%", re.MULTILINE)
+SIZE_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+
+class Variant:
+    """One point of the configuration matrix."""
+
+    def __init__(self, model: str, build_type: str, overrides: Sequence[Tuple[str, str]]) -> None:
+        self.model = model
+        self.build_type = build_type
+        self.overrides = list(overrides)
+
+    @property
+    def name(self) -> str:
+        parts = [self.model, self.build_type]
+        parts.extend(f"{key.strip('_').lower()}={value}" for key, value in self.overrides)
+        return "-".join(parts)
+
+    @property
+    def dir_name(self) -> str:
+        return re.sub(r"[^A-Za-z0-9_.=-]", "_", self.name)
+
+    def cmake_args(self) -> List[str]:
+        args = [
+            f"-DCMAKE_BUILD_TYPE={self.build_type}",
+            f"-DOS_MEMORY_MODEL={self.model}",
+            "-DOS_ISOLATED_BUILD=ON",
+            "-DENABLE_COMPILER_CACHE=ON",
+            # Unity sources live in the variant's build dir and would defeat the shared cache
+            "-DENABLE_UNITY_BUILD=OFF",
+        ]
+        if self.overrides:
+            args.append("-DOS_BOARD_OVERRIDES=" + ";".join(f"{k}={v}" for k, v in self.overrides))
+        return args
+
+
+class VariantResult:
+    """Outcome of configuring and building one variant."""
+
+    def __init__(self, variant: Variant, build_dir: Path) -> None:
+        self.variant = variant
+        self.build_dir = build_dir
+        self.status = "pending"       # "ok" | "skipped" | "configure_failed" | "build_failed" | "measure_failed"
+        self.reason = ""
+        self.configure_time = 0.0
+        self.build_time = 0.0
+        self.elf: Optional[Path] = None
+        self.text = 0
+        self.data = 0
+        self.bss = 0
+        # region -> (used bytes, region bytes, percent)
+        self.regions: Dict[str, Tuple[int, int, float]] = {}
+
+    @property
+    def flash(self) -> int:
+        return self.text + self.data
+
+    @property
+    def ram(self) -> int:
+        return self.data + self.bss
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.variant.name,
+            "model": self.variant.model,
+            "build_type": self.variant.build_type,
+            "overrides": dict(self.variant.overrides),
+            "status": self.status,
+            "reason": self.reason,
+            "build_dir": str(self.build_dir),
+            "elf": str(self.elf) if self.elf else None,
+            "configure_time": round(self.configure_time, 3),
+            "build_time": round(self.build_time, 3),
+            "text": self.text,
+            "data": self.data,
+            "bss": self.bss,
+            "flash": self.flash,
+            "ram": self.ram,
+            "regions": {name: {"used": u, "size": s, "percent": p} for name, (u, s, p) in self.regions.items()},
+        }
+
+
+class ConfigMatrix:
+    """Enumerate variants, build them with bounded concurrency and report their footprint."""
+
+    def __init__(self, project_root: Path, matrix_dir: Path, jobs: int, build_jobs: int,
+                 generator: Optional[str], size_tool: str, clean: bool) -> None:
+        self.project_root = project_root
+        self.matrix_dir = matrix_dir
+        self.jobs = max(1, jobs)
+        self.build_jobs = max(1, build_jobs)
+        self.generator = generator
+        self.size_tool = size_tool
+        self.clean = clean
+        self.env = os.environ.copy()
+        # One compiler cache for every variant
+        self.env.setdefault("STRATOS_CACHE_DIR", str(matrix_dir / "compiler_cache"))
+
+    @staticmethod
+    def enumerate(models: Sequence[str], build_types: Sequence[str],
+                  sets: Dict[str, List[str]]) -> List[Variant]:
+        keys = list(sets)
+        variants = []
+        for model, build_type in itertools.product(models, build_types):
+            for values in itertools.product(*(sets[k] for k in keys)):
+                variants.append(Variant(model, build_type, list(zip(keys, values))))
+        return variants
+
+    # -------------------------------------------------------------------------
+    # Pre-checks
+    # -------------------------------------------------------------------------
+    def linker_script(self, model: str) -> Path:
+        if model == "static":
+            return self.project_root / STATIC_TEMPLATE
+        return self.project_root / LINKER_DIR / f"STM32F103md_{model}.ld"
+
+    def skip_reason(self, variant: Variant) -> Optional[str]:
+        script = self.linker_script(variant.model)
+        if not script.is_file():
+            return f"{script.relative_to(self.project_root)} not found"
+        text = re.sub(r"/\*.*?\*/", "", script.read_text(encoding="utf-8", errors="replace"), flags=re.DOTALL)
+        if not re.search(r"\bSECTIONS\b", text):
+            return f"{script.relative_to(self.project_root)} has no SECTIONS"
+        return None
+
+    # -------------------------------------------------------------------------
+    # Build
+    # -------------------------------------------------------------------------
+    def _run(self, cmd: List[str], log) -> Tuple[int, str, float]:
+        start = time.monotonic()
+        result = subprocess.run(cmd, cwd=str(self.project_root), env=self.env,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+        elapsed = time.monotonic() - start
+        log.write(f"$ {' '.join(cmd)}\n{result.stdout}\n")
+        return result.returncode, result.stdout, elapsed
+
+    def build(self, variant: Variant) -> VariantResult:
+        build_dir = self.matrix_dir / variant.dir_name
+        result = VariantResult(variant, build_dir)
+        reason = self.skip_reason(variant)
+        if reason:
+            result.status = "skipped"
+            result.reason = reason
+            return result
+
+        if self.clean and build_dir.exists():
+            shutil.rmtree(build_dir)
+        build_dir.mkdir(parents=True, exist_ok=True)
+
+        with open(build_dir / "matrix.log", "w", encoding="utf-8") as log:
+            configure = ["cmake", "-S", str(self.project_root), "-B", str(build_dir)] + variant.cmake_args()
+            if self.generator:
+                configure[1:1] = ["-G", self.generator]
+            code, _, result.configure_time = self._run(configure, log)
+            if code != 0:
+                result.status = "configure_failed"
+                result.reason = f"see {build_dir / 'matrix.log'}"
+                return result
+
+            build = ["cmake", "--build", str(build_dir), "--parallel", str(self.build_jobs)]
+            code, output, result.build_time = self._run(build, log)
+            if code != 0:
+                result.status = "build_failed"
+                result.reason = f"see {build_dir / 'matrix.log'}"
+                return result
+
+        result.regions = self._parse_memory_usage(output)
+        result.elf = self._find_elf(build_dir)
+        if result.elf is None:
+            result.status = "build_failed"
+            result.reason = "no .elf produced"
+            return result
+        error = self._measure(result)
+        if error:
+            result.status = "measure_failed"
+            result.reason = error
+            return result
+        result.status = "ok"
+        return result
+
+    @staticmethod
+    def _parse_memory_usage(output: str) -> Dict[str, Tuple[int, int, float]]:
+        regions = {}
+        for name, used, used_unit, size, size_unit, percent in MEMORY_USAGE_LINE.findall(output):
+            regions[name] = (int(used) * SIZE_UNITS.get(used_unit, 1),
+                             int(size) * SIZE_UNITS.get(size_unit, 1),
+                             float(percent))
+        return regions
+
+    @staticmethod
+    def _find_elf(build_dir: Path) -> Optional[Path]:
+        elves = [p for p in build_dir.rglob("*.elf") if "CMakeFiles" not in p.parts and "bin" not in p.parts]
+        return min(elves, key=lambda p: len(p.parts)) if elves else None
+
+    def _measure(self, result: VariantResult) -> Optional[str]:
+        """Fill in the section sizes; returns an error message instead of raising out of the worker."""
+        # Berkeley format: "text data bss dec hex filename"
+        try:
+            output = subprocess.run([self.size_tool, "-B", str(result.elf)], stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, text=True, check=True).stdout
+        except subprocess.CalledProcessError as e:
+            return f"{self.size_tool} exited with {e.returncode}: {e.stderr.strip()}"
+        except OSError as e:
+            return f"cannot run {self.size_tool}: {e}"
+        try:
+            fields = output.strip().splitlines()[-1].split()
+            result.text, result.data, result.bss = (int(v) for v in fields[:3])
+        except (IndexError, ValueError):
+            return f"unexpected {self.size_tool} output: {output.strip()!r}"
+        return None
+
+    def run(self, variants: Sequence[Variant]) -> List[VariantResult]:
+        self.matrix_dir.mkdir(parents=True, exist_ok=True)
+        results: List[VariantResult] = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for result in pool.map(self.build, variants):
+                print(f"[{result.status:>16}] {result.variant.name}"
+                      + (f" ({result.reason})" if result.reason else ""), flush=True)
+                results.append(result)
+        return results
+
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+SORT_KEYS = {
+    "name": lambda r: r.variant.name,
+    "flash": lambda r: r.flash,
+    "ram": lambda r: r.ram,
+    "time": lambda r: r.configure_time + r.build_time,
+}
+
+
+def format_table(results: Sequence[VariantResult], sort: str) -> str:
+    ok = sorted((r for r in results if r.status == "ok"), key=SORT_KEYS[sort])
+    rest = [r for r in results if r.status != "ok"]
+    header = ["variant", "status", "flash", "ram", "text", "data", "bss", "FLASH %", "RAM %", "configure", "build"]
+    rows = []
+    for r in ok + rest:
+        if r.status == "ok":
+            flash_pct = r.regions.get("FLASH", (0, 0, None))[2]
+            ram_pct = r.regions.get("RAM", (0, 0, None))[2]
+            rows.append([r.variant.name, r.status, str(r.flash), str(r.ram), str(r.text), str(r.data), str(r.bss),
+                         f"{flash_pct:.2f}" if flash_pct is not None else "-",
+                         f"{ram_pct:.2f}" if ram_pct is not None else "-",
+                         f"{r.configure_time:.1f}s", f"{r.build_time:.1f}s"])
+        else:
+            rows.append([r.variant.name, r.status] + ["-"] * 7 +
+                        [f"{r.configure_time:.1f}s" if r.configure_time else "-",
+                         f"{r.build_time:.1f}s" if r.build_time else "-"])
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = ["| " + " | ".join(h.ljust(w) for h, w in zip(header, widths)) + " |",
+             "|" + "|".join("-" * (w + 2) for w in widths) + "|"]
+    lines.extend("| " + " | ".join(c.ljust(w) for c, w in zip(row, widths)) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def parse_sets(items: Sequence[str]) -> Dict[str, List[str]]:
+    sets: Dict[str, List[str]] = {}
+    for item in items:
+        name, sep, values = item.partition("=")
+        if not sep or not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name) or not values:
+            raise ValueError(f"Invalid --set '{item}', expected NAME=VALUE[,VALUE...]")
+        sets[name] = [v for v in values.split(",") if v]
+    return sets
+
+
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[2]
+
+    parser = argparse.ArgumentParser(description="Build and compare memory model / board configuration variants")
+    parser.add_argument("--model", nargs="+", choices=MEMORY_MODELS, default=list(MEMORY_MODELS),
+                        help="Memory models (linker script variants) to build")
+    parser.add_argument("--build-type", nargs="+", default=["MinSizeRel"], help="CMAKE_BUILD_TYPE values")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2",
+                        help="Board variable values to sweep, e.g. _USER_POOL_SIZE_=0x1800,0x2000")
+    parser.add_argument("--matrix-dir", type=str, default=str(project_root / "build" / "matrix"),
+                        help="Parent directory of the variant build directories")
+    parser.add_argument("--jobs", "-j", type=int, default=2, help="Number of variants built concurrently")
+    parser.add_argument("--build-jobs", type=int, default=0,
+                        help="Parallel jobs per build (default: CPU count / --jobs)")
+    parser.add_argument("--generator", "-G", type=str, help="CMake generator, e.g. Ninja")
+    parser.add_argument("--size-tool", type=str, default="arm-none-eabi-size", help="size utility for the ELF")
+    parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="flash", help="Sort successful variants by")
+    parser.add_argument("--clean", action="store_true", help="Remove variant build directories first")
+    parser.add_argument("--json", type=str, help="Write a JSON report to this path")
+    args = parser.parse_args()
+
+    try:
+        sets = parse_sets(args.set)
+    except ValueError as e:
+        parser.error(str(e))
+    if shutil.which("arm-none-eabi-gcc") is None or shutil.which(args.size_tool) is None:
+        print(f"arm-none-eabi-gcc and {args.size_tool} must be on PATH", file=sys.stderr)
+        return 1
+
+    build_jobs = args.build_jobs or max(1, (os.cpu_count() or 1) // max(1, args.jobs))
+    matrix = ConfigMatrix(project_root, Path(args.matrix_dir).resolve(), args.jobs, build_jobs,
+                          args.generator, args.size_tool, args.clean)
+    variants = ConfigMatrix.enumerate(args.model, args.build_type, sets)
+    print(f"{len(variants)} variants, {matrix.jobs} at a time, {build_jobs} build jobs each")
+
+    results = matrix.run(variants)
+    print()
+    print(format_table(results, args.sort))
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([r.to_dict() for r in results], f, indent=2)
+
+    failed = [r for r in results if r.status in ("configure_failed", "build_failed", "measure_failed")]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+cycle_estimator.py
+
+Static best/worst-case cycle counts for the context-switch hot paths
+(PendSV_Handler and friends), using the Cortex-M3/M4 instruction timing
+tables of the ARM Technical Reference Manuals.
+
+Functions are read either from the hand-written assembly sources or from the
+disassembly of a built ELF (arm-none-eabi-objdump). Every path through a
+function is costed; conditional branches and IT blocks contribute both their
+taken and not-taken costs, so the result is the cheapest and the most
+expensive path from entry to return.
+
+Timing model (zero-wait-state memory):
+    - data processing 1, pipeline refill P = 1..3 on taken branches / writes to PC
+    - LDR/STR 2, or 1 when pipelined behind another single load/store
+    - LDM/STM/PUSH/POP and VLDM/VSTM/VPUSH/VPOP 1 + N registers (a D register counts twice)
+    - called functions are not included unless --follow-calls is given and the
+      callee is available and loop-free
+    - exception handlers (*_Handler) add entry (12 cycles, 6 when tail-chained)
+      and exit (10 cycles) stacking
+    - cortex-m4f: with lazy stacking the first FP instruction may stall for the
+      deferred S0-S15/FPSCR save (+17), and returning into an extended frame
+      unstacks 17 more words; without lazy stacking entry can take 29 cycles
+
+For CI, --check compares the worst case of each function with the budget in
+tools/profiling/cycle_budget.json and fails if it grew.
+
+Usage:
+    python tools/profiling/cycle_estimator.py                       # default assembly sources
+    python tools/profiling/cycle_estimator.py os_hal/.../pend_sv_handler.s --core cortex-m3 -v
+    python tools/profiling/cycle_estimator.py --elf build/user/StratOS_test.elf --core cortex-m3 \\
+        --function PendSV_Handler --follow-calls
+    python tools/profiling/cycle_estimator.py --check               # CI gate
+    python tools/profiling/cycle_estimator.py --update-budget
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+CORES = ("cortex-m3", "cortex-m4", "cortex-m4f")
+
+# Hand-written context switch sources and the core they run on
+DEFAULT_SOURCES = {
+    "os_hal/include/platform/cortex_m3/stm32f1/pend_sv_handler.s": "cortex-m3",
+    "os_hal/include/platform/cortex_m4/stm32f4/context_switch.s": "cortex-m4f",
+}
+
+# Pipeline refill after a taken branch: 1 (aligned 16-bit target) .. 3 (unaligned 32-bit target)
+P_BEST, P_WORST = 1, 3
+
+# Exception stacking (basic frame 8 words; FP extended frame adds S0-S15 and FPSCR)
+ENTRY_CYCLES = 12
+TAIL_CHAIN_CYCLES = 6
+EXIT_CYCLES = 10
+FP_FRAME_EXTRA = 17
+
+CONDITIONS = {"eq", "ne", "cs", "hs", "cc", "lo", "mi", "pl", "vs", "vc",
+              "hi", "ls", "ge", "lt", "gt", "le", "al"}
+
+ALU = {
+    "mov", "mvn", "add", "adc", "sub", "sbc", "rsb", "and", "orr", "orn", "eor", "bic",
+    "cmp", "cmn", "tst", "teq", "lsl", "lsr", "asr", "ror", "rrx", "movw", "movt", "adr",
+    "neg", "clz", "rbit", "rev", "rev16", "revsh", "uxtb", "uxth", "sxtb", "sxth",
+    "ubfx", "sbfx", "bfi", "bfc", "ssat", "usat", "cpy", "addw", "subw",
+}
+SINGLE_MEMORY = {"ldr", "ldrb", "ldrh", "ldrsb", "ldrsh", "ldrt", "ldrbt", "ldrht",
+                 "str", "strb", "strh", "strt", "strbt", "strht", "ldrex", "ldrexb", "ldrexh",
+                 "strex", "strexb", "strexh"}
+DOUBLE_MEMORY = {"ldrd", "strd"}
+MULTIPLE_MEMORY = {"ldm", "ldmia", "ldmfd", "ldmdb", "ldmea", "stm", "stmia", "stmea",
+                   "stmdb", "stmfd", "push", "pop"}
+FP_MULTIPLE = {"vldm", "vldmia", "vldmdb", "vstm", "vstmia", "vstmdb", "vpush", "vpop"}
+FP_SINGLE_MEMORY = {"vldr", "vstr"}
+FP_SIMPLE = {"vmov", "vmrs", "vmsr", "vadd", "vsub", "vmul", "vnmul", "vneg", "vabs",
+             "vcmp", "vcmpe", "vcvt", "vcvtr"}
+FP_MAC = {"vmla", "vmls", "vnmla", "vnmls", "vfma", "vfms", "vfnma", "vfnms"}
+FP_LONG = {"vdiv", "vsqrt"}
+SYSTEM = {"mrs", "msr", "cpsid", "cpsie", "nop", "sev", "bkpt", "clrex", "yield", "svc"}
+BARRIERS = {"isb", "dsb", "dmb"}
+WAITS = {"wfi", "wfe"}
+BRANCHES = {"b", "bl", "bx", "blx", "cbz", "cbnz", "tbb", "tbh"}
+
+# (best, worst) per core for the multiply/divide family
+MULTIPLY = {
+    "mul": {"cortex-m3": (1, 1), "cortex-m4": (1, 1)},
+    "mla": {"cortex-m3": (2, 2), "cortex-m4": (1, 1)},
+    "mls": {"cortex-m3": (2, 2), "cortex-m4": (1, 1)},
+    "umull": {"cortex-m3": (3, 5), "cortex-m4": (1, 1)},
+    "smull": {"cortex-m3": (3, 5), "cortex-m4": (1, 1)},
+    "umlal": {"cortex-m3": (4, 7), "cortex-m4": (1, 1)},
+    "smlal": {"cortex-m3": (4, 7), "cortex-m4": (1, 1)},
+    "sdiv": {"cortex-m3": (2, 12), "cortex-m4": (2, 12)},
+    "udiv": {"cortex-m3": (2, 12), "cortex-m4": (2, 12)},
+}
+
+KNOWN = (ALU | SINGLE_MEMORY | DOUBLE_MEMORY | MULTIPLE_MEMORY | FP_MULTIPLE | FP_SINGLE_MEMORY
+         | FP_SIMPLE | FP_MAC | FP_LONG | SYSTEM | BARRIERS | WAITS | BRANCHES | set(MULTIPLY) | {"it"})
+FP_INSTRUCTIONS = FP_MULTIPLE | FP_SINGLE_MEMORY | FP_SIMPLE | FP_MAC | FP_LONG
+
+REGISTER_RANGE = re.compile(r"^([rsd])(\d+)\s*-\s*\1?(\d+)$")
+
+
+class Instruction:
+    """One instruction with its normalized mnemonic and condition."""
+
+    def __init__(self, text: str, mnemonic: str, operands: str, line: str) -> None:
+        self.text = text
+        self.raw_mnemonic = mnemonic.lower()
+        self.operands = operands.strip()
+        self.line = line                    # "file:line" or address, for reports
+        self.mnemonic, self.condition = self._normalize(self.raw_mnemonic)
+        self.in_it_block = False
+        self.target: Optional[str] = None   # branch target (label or symbol)
+
+    @staticmethod
+    def _normalize(mnemonic: str) -> Tuple[str, Optional[str]]:
+        # Drop width/type qualifiers: b.n, ldr.w, vadd.f32, vcvt.f32.s32
+        base = mnemonic.split(".", 1)[0]
+        if re.fullmatch(r"it[te]{0,3}", base):
+            return "it", None
+        candidates = [(base, None)]
+        if base[-2:] in CONDITIONS:
+            candidates.append((base[:-2], base[-2:]))
+            if base[:-2].endswith("s"):
+                candidates.append((base[:-3], base[-2:]))
+        if base.endswith("s"):
+            candidates.append((base[:-1], None))
+        for name, condition in candidates:
+            if name in KNOWN:
+                return name, condition
+        return base, None
+
+    @property
+    def known(self) -> bool:
+        return self.mnemonic in KNOWN
+
+    @property
+    def conditional(self) -> bool:
+        return self.in_it_block or (self.condition not in (None, "al"))
+
+    @property
+    def is_fp(self) -> bool:
+        return self.mnemonic in FP_INSTRUCTIONS
+
+    def register_list(self) -> List[str]:
+        match = re.search(r"\{([^}]*)\}", self.operands)
+        if not match:
+            return []
+        registers: List[str] = []
+        for item in match.group(1).split(","):
+            item = item.strip().lower()
+            if not item:
+                continue
+            rng = REGISTER_RANGE.match(item)
+            if rng:
+                kind, first, last = rng.group(1), int(rng.group(2)), int(rng.group(3))
+                registers.extend(f"{kind}{n}" for n in range(first, last + 1))
+            else:
+                registers.append(item)
+        return registers
+
+    def transfer_words(self) -> int:
+        return sum(2 if reg.startswith("d") else 1 for reg in self.register_list())
+
+    def writes_pc(self) -> bool:
+        if self.mnemonic in MULTIPLE_MEMORY:
+            return "pc" in self.register_list() or "r15" in self.register_list()
+        dest = self.operands.split(",", 1)[0].strip().lower()
+        return dest in ("pc", "r15") and (self.mnemonic in ALU or self.mnemonic in SINGLE_MEMORY)
+
+
+class Function:
+    """Instructions of one function plus its local labels (label -> instruction index)."""
+
+    def __init__(self, name: str, source: str) -> None:
+        self.name = name
+        self.source = source
+        self.instructions: List[Instruction] = []
+        self.labels: Dict[str, int] = {}
+
+
+# -----------------------------------------------------------------------------
+# Front ends
+# -----------------------------------------------------------------------------
+def _finish_it_blocks(function: Function) -> None:
+    remaining = 0
+    for instr in function.instructions:
+        if instr.mnemonic == "it":
+            # it, itt, ite, ittee ... : one conditional instruction per letter after "i"
+            remaining = len(instr.raw_mnemonic) - 1
+            continue
+        if remaining:
+            instr.in_it_block = True
+            remaining -= 1
+
+
+def _branch_target(instr: Instruction) -> None:
+    if instr.mnemonic in ("b", "bl"):
+        instr.target = instr.operands.split()[0] if instr.operands else None
+    elif instr.mnemonic in ("cbz", "cbnz"):
+        parts = instr.operands.split(",", 1)
+        instr.target = parts[1].strip().split()[0] if len(parts) == 2 else None
+
+
+def parse_assembly(path: Path) -> List[Function]:
+    """Functions (.type X, %function / .thumb_func) of a GNU as source file."""
+    text = path.read_text(encoding="utf-8", errors="replace")
+    # Keep line numbers while removing block comments
+    text = re.sub(r"/\*.*?\*/", lambda m: "\n" * m.group(0).count("\n"), text, flags=re.DOTALL)
+
+    declared: Set[str] = set()
+    thumb_func_next = False
+    functions: List[Function] = []
+    current: Optional[Function] = None
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = re.split(r"//|@(?!function)", raw, 1)[0]
+        for statement in line.split(";"):
+            statement = statement.strip()
+            while True:
+                label = re.match(r"^([A-Za-z_.$][\w.$]*|\d+):\s*", statement)
+                if not label:
+                    break
+                name = label.group(1)
+                if name in declared or thumb_func_next:
+                    current = Function(name, str(path))
+                    functions.append(current)
+                    thumb_func_next = False
+                elif current is not None:
+                    # Numeric local labels may repeat; keep every definition
+                    current.labels.setdefault(name, len(current.instructions))
+                    current.labels[f"{name}@{len(current.instructions)}"] = len(current.instructions)
+                statement = statement[label.end():]
+            if not statement:
+                continue
+            if statement.startswith("."):
+                directive = statement.split(None, 1)
+                args = directive[1] if len(directive) > 1 else ""
+                if directive[0] == ".type" and re.search(r"[%@\"]?function", args):
+                    declared.add(args.split(",")[0].strip())
+                elif directive[0] == ".thumb_func":
+                    thumb_func_next = True
+                elif directive[0] == ".size" and current is not None and args.split(",")[0].strip() == current.name:
+                    current = None
+                continue
+            if current is None:
+                continue
+            parts = statement.split(None, 1)
+            instr = Instruction(statement, parts[0], parts[1] if len(parts) > 1 else "", f"{path.name}:{lineno}")
+            _branch_target(instr)
+            current.instructions.append(instr)
+
+    for function in functions:
+        _finish_it_blocks(function)
+    return functions
+
+
+def parse_objdump(elf: Path, objdump: str) -> List[Function]:
+    """Functions from `objdump -d` of a linked ELF; branch targets become symbol/offset labels."""
+    output = subprocess.run([objdump, "-d", "--no-show-raw-insn", str(elf)], stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True, check=True).stdout
+    functions: List[Function] = []
+    current: Optional[Function] = None
+    addresses: Dict[str, int] = {}
+    for line in output.splitlines():
+        header = re.match(r"^([0-9a-f]+) <([^>]+)>:$", line)
+        if header:
+            current = Function(header.group(2), str(elf))
+            functions.append(current)
+            addresses = {}
+            continue
+        insn = re.match(r"^\s*([0-9a-f]+):\s+(\S+)\s*(.*)$", line)
+        if not insn or current is None:
+            continue
+        address, mnemonic, operands = insn.groups()
+        if mnemonic.startswith(".") or mnemonic == "...":
+            continue  # literal pools and padding
+        operands = operands.split("@", 1)[0].split(";", 1)[0].strip()
+        instr = Instruction(line.strip(), mnemonic, operands, f"0x{address}")
+        addresses[address.lstrip("0") or "0"] = len(current.instructions)
+        current.labels[f"0x{address.lstrip('0') or '0'}"] = len(current.instructions)
+        _branch_target(instr)
+        if instr.target:
+            symbol = re.search(r"<([^>+]+)(\+0x[0-9a-f]+)?>", operands)
+            if symbol and symbol.group(1) == current.name:
+                instr.target = "0x" + (instr.target.lstrip("0") or "0")
+            elif symbol:
+                instr.target = symbol.group(1)
+        current.instructions.append(instr)
+
+    for function in functions:
+        _finish_it_blocks(function)
+    return functions
+
+
+# -----------------------------------------------------------------------------
+# Timing
+# -----------------------------------------------------------------------------
+class CycleModel:
+    """Per-instruction (best, worst) cycles for one core."""
+
+    def __init__(self, core: str) -> None:
+        self.core = core
+        self.family = "cortex-m3" if core == "cortex-m3" else "cortex-m4"
+        self.has_fpu = core == "cortex-m4f"
+
+    def cost(self, instr: Instruction, previous: Optional[Instruction]) -> Tuple[int, int]:
+        """Cycles when the instruction executes; branches are costed as taken."""
+        m = instr.mnemonic
+        if m == "it":
+            return 0, 1  # may fold into the preceding instruction
+        if m in ALU:
+            return (1 + P_BEST, 1 + P_WORST) if instr.writes_pc() else (1, 1)
+        if m in MULTIPLY:
+            return MULTIPLY[m][self.family]
+        if m in SINGLE_MEMORY:
+            if instr.writes_pc():
+                return 2 + P_BEST, 2 + P_WORST
+            pipelined = previous is not None and previous.mnemonic in SINGLE_MEMORY | FP_SINGLE_MEMORY
+            return (1 if pipelined else 2), 2
+        if m in DOUBLE_MEMORY:
+            return 3, 3
+        if m in MULTIPLE_MEMORY:
+            n = 1 + len(instr.register_list())
+            return (n + P_BEST, n + P_WORST) if instr.writes_pc() else (n, n)
+        if m in FP_MULTIPLE:
+            n = 1 + instr.transfer_words()
+            return n, n
+        if m in FP_SINGLE_MEMORY:
+            return 2, 2
+        if m in FP_SIMPLE:
+            return 1, 2 if m == "vmov" else 1
+        if m in FP_MAC:
+            return 3, 3
+        if m in FP_LONG:
+            return 14, 14
+        if m in SYSTEM:
+            return 1, 1
+        if m in BARRIERS:
+            return 1, 1 + P_WORST
+        if m in WAITS:
+            return 1, 1
+        if m in ("b", "bl", "bx", "blx", "cbz", "cbnz"):
+            return 1 + P_BEST, 1 + P_WORST
+        if m in ("tbb", "tbh"):
+            return 2 + P_BEST, 2 + P_WORST
+        return 1, 1
+
+
+class PathCost:
+    """Best/worst cycles of a function body plus what the estimate leaves out."""
+
+    def __init__(self) -> None:
+        self.best = 0
+        self.worst: Optional[int] = 0        # None: unbounded (loop or wait)
+        self.calls: Dict[str, bool] = {}     # callee -> included in the estimate
+        self.unknown: Set[str] = set()
+        self.uses_fp = False
+        self.notes: List[str] = []
+
+
+class CycleEstimator:
+    """Cost every path of the selected functions."""
+
+    EXIT = -1
+
+    def __init__(self, core: str, functions: Sequence[Function], follow_calls: bool = False,
+                 lazy_stacking: bool = True) -> None:
+        self.model = CycleModel(core)
+        self.functions = {f.name: f for f in functions}
+        self.follow_calls = follow_calls
+        self.lazy_stacking = lazy_stacking
+        self._memo: Dict[str, PathCost] = {}
+        self._active: Set[str] = set()
+
+    def _resolve(self, function: Function, target: Optional[str], index: int) -> Optional[int]:
+        if target is None:
+            return None
+        if re.fullmatch(r"\d+[fb]", target):
+            # Numeric local label: nearest definition forward or backward
+            name, direction = target[:-1], target[-1]
+            defs = sorted(i for key, i in function.labels.items() if key.startswith(f"{name}@"))
+            if direction == "f":
+                return next((i for i in defs if i > index), None)
+            return next((i for i in reversed(defs) if i <= index), None)
+        return function.labels.get(target)
+
+    def _edges(self, function: Function, index: int, cost: PathCost) -> List[Tuple[int, int, Optional[int]]]:
+        """(successor, best, worst) edges leaving instruction `index`."""
+        instrs = function.instructions
+        instr = instrs[index]
+        previous = instrs[index - 1] if index > 0 else None
+        nxt = index + 1 if index + 1 < len(instrs) else self.EXIT
+        best, worst = self.model.cost(instr, previous)
+        m = instr.mnemonic
+        edges: List[Tuple[int, int, Optional[int]]] = []
+
+        if not instr.known:
+            cost.unknown.add(instr.raw_mnemonic)
+        if instr.is_fp:
+            if not self.model.has_fpu:
+                cost.notes.append(f"{instr.line}: FP instruction '{instr.raw_mnemonic}' on {self.model.core}")
+            cost.uses_fp = True
+        if m in WAITS:
+            cost.notes.append(f"{instr.line}: {m} waits for an event, worst case is unbounded")
+            worst = None  # type: ignore[assignment]
+
+        if m in ("b", "cbz", "cbnz"):
+            target = self._resolve(function, instr.target, index)
+            if target is None:
+                # Tail call / jump out of the function
+                edges.append((self.EXIT, best, worst))
+                if instr.target:
+                    cost.calls.setdefault(instr.target, False)
+            else:
+                edges.append((target, best, worst))
+            if m in ("cbz", "cbnz") or instr.conditional:
+                edges.append((nxt, 1, 1))
+            return edges
+
+        if m in ("bl", "blx"):
+            callee_best, callee_worst = 0, 0
+            callee = instr.target if m == "bl" else None
+            if callee:
+                included = False
+                if self.follow_calls and callee in self.functions and callee not in self._active:
+                    sub = self.analyze(self.functions[callee])
+                    if sub.worst is not None:
+                        callee_best, callee_worst = sub.best, sub.worst
+                        included = True
+                cost.calls[callee] = cost.calls.get(callee, False) or included
+            else:
+                cost.calls.setdefault(f"indirect ({instr.operands})", False)
+            edges.append((nxt, best + callee_best, None if worst is None else worst + callee_worst))
+            if instr.conditional:
+                edges.append((nxt, 1, 1))
+            return edges
+
+        if m == "bx" or instr.writes_pc() or m in ("tbb", "tbh"):
+            if m in ("tbb", "tbh"):
+                cost.notes.append(f"{instr.line}: table branch treated as leaving the function")
+            edges.append((self.EXIT, best, worst))
+            if instr.conditional:
+                edges.append((nxt, 1, 1))
+            return edges
+
+        if instr.conditional:
+            edges.append((nxt, min(1, best), None if worst is None else max(1, worst)))
+        else:
+            edges.append((nxt, best, worst))
+        return edges
+
+    def analyze(self, function: Function) -> PathCost:
+        if function.name in self._memo:
+            return self._memo[function.name]
+        self._active.add(function.name)
+        cost = PathCost()
+        if not function.instructions:
+            cost.notes.append("function has no instructions")
+            self._active.discard(function.name)
+            self._memo[function.name] = cost
+            return cost
+
+        edges = {i: self._edges(function, i, cost) for i in range(len(function.instructions))}
+        best: Dict[int, int] = {self.EXIT: 0}
+        worst: Dict[int, Optional[int]] = {self.EXIT: 0}
+        state: Dict[int, int] = {}   # 1 = on stack, 2 = done
+        loop = False
+
+        # Iterative post-order DFS: best/worst cost from each instruction to the exit
+        stack: List[Tuple[int, bool]] = [(0, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node == self.EXIT or state.get(node) == 2:
+                continue
+            if expanded:
+                best_options = [b + best[s] for s, b, _ in edges[node] if s in best]
+                worst_options = []
+                for s, _, w in edges[node]:
+                    ws = worst.get(s)
+                    worst_options.append(None if w is None or ws is None else w + ws)
+                best[node] = min(best_options) if best_options else 0
+                worst[node] = None if None in worst_options or not worst_options else max(worst_options)
+                state[node] = 2
+                continue
+            if state.get(node) == 1:
+                continue
+            state[node] = 1
+            stack.append((node, True))
+            for succ, _, _ in edges[node]:
+                if succ == self.EXIT:
+                    continue
+                if state.get(succ) == 1:
+                    loop = True
+                    worst[succ] = None
+                elif state.get(succ) != 2:
+                    stack.append((succ, False))
+
+        cost.best = best.get(0, 0)
+        cost.worst = None if loop else worst.get(0)
+        if loop:
+            cost.notes.append("contains a loop, worst case is unbounded")
+        self._active.discard(function.name)
+        self._memo[function.name] = cost
+        return cost
+
+    def exception_cycles(self, cost: PathCost) -> Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
+        """(entry, lazy FP preservation, exit) as (best, worst) for an exception handler."""
+        entry = (TAIL_CHAIN_CYCLES, ENTRY_CYCLES)
+        lazy = (0, 0)
+        exit_ = (EXIT_CYCLES, EXIT_CYCLES)
+        if self.model.has_fpu:
+            if self.lazy_stacking:
+                # Deferred S0-S15/FPSCR save happens only if the handler touches the FPU
+                lazy = (0, FP_FRAME_EXTRA if cost.uses_fp else 0)
+            else:
+                entry = (TAIL_CHAIN_CYCLES, ENTRY_CYCLES + FP_FRAME_EXTRA)
+            exit_ = (EXIT_CYCLES, EXIT_CYCLES + FP_FRAME_EXTRA)
+        return entry, lazy, exit_
+
+
+# -----------------------------------------------------------------------------
+# Report and budget
+# -----------------------------------------------------------------------------
+def fmt(value: Optional[int]) -> str:
+    return "unbounded" if value is None else str(value)
+
+
+def estimate(estimator: CycleEstimator, function: Function, verbose: bool) -> Tuple[Dict[str, object], List[str]]:
+    cost = estimator.analyze(function)
+    lines = [f"{function.name}  ({estimator.model.core}, {function.source})"]
+    total_best, total_worst = cost.best, cost.worst
+    lines.append(f"  {'body':<24} best {cost.best:>5}  worst {fmt(cost.worst):>5}")
+    if function.name.endswith("_Handler") and function.instructions:
+        entry, lazy, exit_ = estimator.exception_cycles(cost)
+        for label, (b, w) in (("exception entry", entry), ("lazy FP preservation", lazy), ("exception exit", exit_)):
+            if label == "lazy FP preservation" and w == 0:
+                continue
+            lines.append(f"  {label:<24} best {b:>5}  worst {w:>5}")
+            total_best += b
+            total_worst = None if total_worst is None else total_worst + w
+    lines.append(f"  {'total':<24} best {total_best:>5}  worst {fmt(total_worst):>5}")
+    for callee, included in sorted(cost.calls.items()):
+        lines.append(f"  call {callee}: {'included' if included else 'not included'}")
+    if cost.unknown:
+        lines.append(f"  unknown instructions counted as 1 cycle: {', '.join(sorted(cost.unknown))}")
+    for note in dict.fromkeys(cost.notes):
+        lines.append(f"  note: {note}")
+
+    if verbose:
+        previous = None
+        for instr in function.instructions:
+            b, w = estimator.model.cost(instr, previous)
+            flag = " (cond)" if instr.conditional else ""
+            lines.append(f"    {instr.line:<28} {b:>3}..{w:<3} {instr.text}{flag}")
+            previous = instr
+
+    result = {"core": estimator.model.core, "source": function.source,
+              "body_best": cost.best, "body_worst": cost.worst,
+              "best": total_best, "worst": total_worst,
+              "calls": {k: v for k, v in sorted(cost.calls.items())}}
+    return result, lines
+
+
+def check_budget(results: Dict[str, Dict[str, object]], budget: Dict[str, Dict[str, object]]) -> List[str]:
+    failures = []
+    for key, expected in sorted(budget.items()):
+        actual = results.get(key)
+        if actual is None:
+            failures.append(f"{key}: in budget but not analyzed")
+            continue
+        if actual["worst"] is None:
+            failures.append(f"{key}: worst case is unbounded (budget {expected['worst']})")
+        elif actual["worst"] > expected["worst"]:
+            failures.append(f"{key}: worst case {actual['worst']} cycles exceeds budget {expected['worst']}")
+    for key in sorted(set(results) - set(budget)):
+        failures.append(f"{key}: not in budget, run with --update-budget")
+    return failures
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[2]
+    default_budget = project_root / "tools" / "profiling" / "cycle_budget.json"
+
+    parser = argparse.ArgumentParser(description="Static best/worst cycle counts for Cortex-M hot paths")
+    parser.add_argument("sources", nargs="*", help="Assembly sources (default: the context switch sources)")
+    parser.add_argument("--elf", type=str, help="Analyze functions disassembled from this ELF instead")
+    parser.add_argument("--objdump", type=str, default="arm-none-eabi-objdump", help="objdump for --elf")
+    parser.add_argument("--core", choices=CORES, help="Core timing model (default: from the source path)")
+    parser.add_argument("--function", action="append", default=[],
+                        help="Only these functions (default: every function in the sources, *_Handler for --elf)")
+    parser.add_argument("--follow-calls", action="store_true", help="Include loop-free callees in the estimate")
+    parser.add_argument("--no-lazy-stacking", action="store_true",
+                        help="cortex-m4f: FPCCR.LSPEN=0, the FP frame is always stacked on entry")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print per-instruction cycles")
+    parser.add_argument("--json", type=str, help="Write the results as JSON")
+    parser.add_argument("--budget", type=str, default=str(default_budget), help="Cycle budget file")
+    parser.add_argument("--check", action="store_true", help="Fail if a worst case exceeds the budget")
+    parser.add_argument("--update-budget", action="store_true", help="Write the current worst cases to the budget")
+    args = parser.parse_args()
+
+    # (core, functions) groups
+    groups: List[Tuple[str, List[Function]]] = []
+    if args.elf:
+        if not args.core:
+            parser.error("--core is required with --elf")
+        functions = parse_objdump(Path(args.elf), args.objdump)
+        groups.append((args.core, functions))
+    else:
+        sources = args.sources or [str(project_root / s) for s in DEFAULT_SOURCES]
+        for source in sources:
+            path = Path(source)
+            rel = path.resolve().relative_to(project_root).as_posix() if path.resolve().is_relative_to(project_root) else source
+            core = args.core or DEFAULT_SOURCES.get(rel)
+            if core is None:
+                core = "cortex-m3" if "cortex_m3" in rel else "cortex-m4f" if "cortex_m4" in rel else None
+            if core is None:
+                parser.error(f"cannot infer the core of {source}, pass --core")
+            functions = parse_assembly(path)
+            if not functions:
+                print(f"{rel}: no functions found, skipped", file=sys.stderr)
+                continue
+            groups.append((core, functions))
+
+    results: Dict[str, Dict[str, object]] = {}
+    for core, functions in groups:
+        estimator = CycleEstimator(core, functions, args.follow_calls, not args.no_lazy_stacking)
+        if args.function:
+            selected = [f for f in functions if f.name in args.function]
+        elif args.elf:
+            selected = [f for f in functions if f.name.endswith("_Handler")]
+        else:
+            selected = functions
+        for function in selected:
+            result, lines = estimate(estimator, function, args.verbose)
+            results[f"{core}:{function.name}"] = result
+            print("\n".join(lines))
+            print()
+
+    if args.function:
+        missing = set(args.function) - {key.split(":", 1)[1] for key in results}
+        for name in sorted(missing):
+            print(f"Function not found: {name}", file=sys.stderr)
+        if missing:
+            return 1
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    budget_path = Path(args.budget)
+    if args.update_budget:
+        budget = {key: {"best": r["best"], "worst": r["worst"]} for key, r in sorted(results.items())}
+        budget_path.write_text(json.dumps(budget, indent=2) + "\n", encoding="utf-8")
+        print(f"Budget written to {budget_path}")
+    elif args.check:
+        if not budget_path.is_file():
+            print(f"Budget not found: {budget_path}", file=sys.stderr)
+            return 1
+        failures = check_budget(results, json.loads(budget_path.read_text(encoding="utf-8")))
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+        if failures:
+            return 1
+        print(f"All {len(results)} paths within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
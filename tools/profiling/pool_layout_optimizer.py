@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pool_layout_optimizer.py
+
+Replays allocation traces recorded by RecordAllocTracePolicy
+(os_kernel/include/policy/memory/trace.hpp) against candidate block-class
+layouts and picks, per pool, the layout with the smallest footprint that never
+fails an allocation (ties broken by internal fragmentation).
+
+Each block class is one DynamicPoolPolicy<Region, BlockSize, BlockCount>; a
+request is served by the smallest class whose block size fits it. For a fixed
+set of block sizes the minimal block count of each class is its peak number of
+live blocks in the trace, so the search only has to choose the block sizes.
+
+Requests that already failed while tracing (addr 0) are still demand: their
+sizes are candidate classes and they occupy a block for the instant they were
+made. Their real lifetime is unknown, so block counts are then a lower bound.
+
+Trace input formats:
+    binary  - raw dump of AllocTraceRecord[] (4 little-endian uint32: op, pool, size, addr)
+    text    - one event per line: "A <pool> <size> <addr>" or "F <pool> <addr>",
+              numbers in decimal or 0x-prefixed hex, '#' starts a comment
+
+Usage:
+    python tools/profiling/pool_layout_optimizer.py trace.bin [more traces...]
+        [--max-classes 4] [--align 8] [--map 0x20003000=KERNEL] [--output result.txt]
+"""
+
+import argparse
+import bisect
+import itertools
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+OP_ALLOCATE = 1
+OP_DEALLOCATE = 2
+RECORD = struct.Struct("<IIII")
+
+# Linker template variable for each pool role
+LINKER_VARIABLES = {
+    "KERNEL": "_KERNEL_POOL_SIZE_",
+    "USER": "_USER_POOL_SIZE_",
+}
+
+
+class PoolTrace:
+    """Allocation events of one pool, as a sequence of (+1/-1, size) steps."""
+
+    def __init__(self, pool: int) -> None:
+        self.pool = pool
+        self.steps: List[Tuple[int, int]] = []
+        self.live: Dict[int, int] = {}
+        self.failed = 0
+        self.unmatched_frees = 0
+
+    def allocate(self, size: int, addr: int) -> None:
+        if addr == 0:
+            # The pool could not serve it at record time, but it is still demand we must fit.
+            # Its lifetime is unknown, so it only holds a block for the instant it was made.
+            self.failed += 1
+            self.steps.append((1, size))
+            self.steps.append((-1, size))
+            return
+        if addr in self.live:
+            # Address reused without a free being recorded: close the old lifetime first
+            self.steps.append((-1, self.live.pop(addr)))
+        self.live[addr] = size
+        self.steps.append((1, size))
+
+    def deallocate(self, addr: int) -> None:
+        size = self.live.pop(addr, None)
+        if size is None:
+            self.unmatched_frees += 1
+            return
+        self.steps.append((-1, size))
+
+    @property
+    def request_sizes(self) -> List[int]:
+        return sorted({size for delta, size in self.steps if delta > 0})
+
+
+class LayoutResult:
+    """Outcome of replaying one pool trace against one set of block sizes."""
+
+    def __init__(self, block_sizes: Sequence[int], block_counts: Sequence[int],
+                 fragmentation: float) -> None:
+        self.block_sizes = list(block_sizes)
+        self.block_counts = list(block_counts)
+        self.fragmentation = fragmentation
+
+    @property
+    def footprint(self) -> int:
+        return sum(s * c for s, c in zip(self.block_sizes, self.block_counts))
+
+
+class PoolLayoutOptimizer:
+    """Load traces, search block-class layouts and format the chosen parameters."""
+
+    def __init__(self, max_classes: int = 4, align: int = 8, max_candidates: int = 24) -> None:
+        self.max_classes = max(1, max_classes)
+        self.align = max(1, align)
+        # Thinning spaces the picks between the smallest and the largest size
+        self.max_candidates = max(2, max_candidates)
+        self.pools: Dict[int, PoolTrace] = {}
+
+    # -------------------------------------------------------------------------
+    # Trace loading
+    # -------------------------------------------------------------------------
+    def load(self, path: Path) -> None:
+        data = path.read_bytes()
+        if self._looks_like_text(data):
+            self._load_text(path, data.decode("utf-8"))
+        else:
+            self._load_binary(path, data)
+
+    @staticmethod
+    def _looks_like_text(data: bytes) -> bool:
+        head = data[:256]
+        return bool(head) and all(b in b"\t\r\n" or 32 <= b < 127 for b in head)
+
+    def _pool(self, pool: int) -> PoolTrace:
+        if pool not in self.pools:
+            self.pools[pool] = PoolTrace(pool)
+        return self.pools[pool]
+
+    def _load_binary(self, path: Path, data: bytes) -> None:
+        if len(data) % RECORD.size:
+            raise ValueError(f"{path}: size {len(data)} is not a multiple of {RECORD.size}-byte records")
+        for op, pool, size, addr in RECORD.iter_unpack(data):
+            if op == OP_ALLOCATE:
+                self._pool(pool).allocate(size, addr)
+            elif op == OP_DEALLOCATE:
+                self._pool(pool).deallocate(addr)
+            else:
+                raise ValueError(f"{path}: unknown trace op {op}")
+
+    def _load_text(self, path: Path, text: str) -> None:
+        for lineno, line in enumerate(text.splitlines(), 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split()
+            try:
+                if fields[0] == "A" and len(fields) == 4:
+                    self._pool(int(fields[1], 0)).allocate(int(fields[2], 0), int(fields[3], 0))
+                elif fields[0] == "F" and len(fields) == 3:
+                    self._pool(int(fields[1], 0)).deallocate(int(fields[2], 0))
+                else:
+                    raise ValueError("expected 'A <pool> <size> <addr>' or 'F <pool> <addr>'")
+            except ValueError as e:
+                raise ValueError(f"{path}:{lineno}: {e}") from e
+
+    # -------------------------------------------------------------------------
+    # Replay and search
+    # -------------------------------------------------------------------------
+    def round_up(self, value: int) -> int:
+        return (value + self.align - 1) // self.align * self.align
+
+    def replay(self, trace: PoolTrace, block_sizes: Sequence[int]) -> Optional[LayoutResult]:
+        """Replay with unbounded counts; the per-class peaks are the minimal counts."""
+        if not trace.steps:
+            return LayoutResult(block_sizes, [0] * len(block_sizes), 0.0)
+        live = [0] * len(block_sizes)
+        peak = [0] * len(block_sizes)
+        live_block_bytes = 0
+        live_request_bytes = 0
+        peak_block_bytes = 0
+        fragmentation = 0.0
+        for delta, size in trace.steps:
+            index = bisect.bisect_left(block_sizes, size)
+            if index == len(block_sizes):
+                return None
+            live[index] += delta
+            if live[index] > peak[index]:
+                peak[index] = live[index]
+            live_block_bytes += delta * block_sizes[index]
+            live_request_bytes += delta * size
+            if live_block_bytes > peak_block_bytes:
+                peak_block_bytes = live_block_bytes
+                fragmentation = 1.0 - live_request_bytes / live_block_bytes
+        return LayoutResult(block_sizes, peak, fragmentation)
+
+    def candidate_sizes(self, trace: PoolTrace) -> List[int]:
+        """Aligned request sizes, thinned to evenly spaced quantiles when there are too many."""
+        sizes = sorted({self.round_up(s) for s in trace.request_sizes})
+        if len(sizes) <= self.max_candidates:
+            return sizes
+        step = (len(sizes) - 1) / (self.max_candidates - 1)
+        picked = {sizes[round(i * step)] for i in range(self.max_candidates)}
+        return sorted(picked)
+
+    def optimize(self, trace: PoolTrace) -> Optional[LayoutResult]:
+        candidates = self.candidate_sizes(trace)
+        if not candidates:
+            return None
+        largest = candidates[-1]
+        others = candidates[:-1]
+        best: Optional[LayoutResult] = None
+        # The largest size must always be a class, otherwise its requests would fail
+        for extra in range(min(self.max_classes, len(candidates))):
+            for combo in itertools.combinations(others, extra):
+                result = self.replay(trace, list(combo) + [largest])
+                if result is None:
+                    continue
+                # Classes that never hold a block are dead weight
+                if 0 in result.block_counts:
+                    continue
+                key = (result.footprint, result.fragmentation, len(result.block_sizes))
+                if best is None or key < (best.footprint, best.fragmentation, len(best.block_sizes)):
+                    best = result
+        return best
+
+    # -------------------------------------------------------------------------
+    # Output
+    # -------------------------------------------------------------------------
+    def format_result(self, trace: PoolTrace, result: LayoutResult, role: Optional[str]) -> List[str]:
+        name = role.lower() if role else f"pool_{trace.pool:08x}"
+        lines = [
+            f"// ===== pool 0x{trace.pool:08X}" + (f" ({role})" if role else "") + " =====",
+            f"// footprint {result.footprint} bytes, internal fragmentation at peak "
+            f"{result.fragmentation * 100:.1f}%",
+        ]
+        if trace.failed:
+            lines.append(f"// WARNING: {trace.failed} allocations already failed while tracing; their "
+                         f"sizes are covered but block counts are a lower bound, re-trace with a larger pool")
+        if trace.unmatched_frees:
+            lines.append(f"// WARNING: {trace.unmatched_frees} frees without a matching allocation")
+
+        offset = 0
+        for index, (block_size, block_count) in enumerate(zip(result.block_sizes, result.block_counts)):
+            class_size = block_size * block_count
+            lines.append(f"using {name}_class{index}_layout = "
+                         f"RelativeLayoutPolicy<ParentRegion, 0x{offset:X}, 0x{class_size:X}>;")
+            lines.append(f"using {name}_class{index}_pool   = "
+                         f"DynamicPoolPolicy<Region, {block_size}, {block_count}>;")
+            offset += self.round_up(class_size)
+
+        if role in LINKER_VARIABLES:
+            lines.append(f"# set({LINKER_VARIABLES[role]} 0x{offset:X})")
+        return lines
+
+    def run(self, roles: Dict[int, str]) -> Tuple[List[str], bool]:
+        output: List[str] = []
+        ok = True
+        for pool_id in sorted(self.pools):
+            trace = self.pools[pool_id]
+            result = self.optimize(trace)
+            if result is None:
+                output.append(f"// pool 0x{pool_id:08X}: no allocations in trace")
+                continue
+            output.extend(self.format_result(trace, result, roles.get(pool_id)))
+            output.append("")
+            ok = ok and trace.failed == 0
+        return output, ok
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def parse_roles(items: Sequence[str]) -> Dict[int, str]:
+    roles: Dict[int, str] = {}
+    for item in items:
+        pool, _, role = item.partition("=")
+        role = role.upper()
+        if role not in LINKER_VARIABLES:
+            raise ValueError(f"Invalid --map '{item}', expected <pool>=KERNEL or <pool>=USER")
+        roles[int(pool, 0)] = role
+    return roles
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Search pool block-class layouts from allocation traces")
+    parser.add_argument("traces", nargs="+", help="Trace files (binary dump or text)")
+    parser.add_argument("--max-classes", type=int, default=4, help="Maximum number of block classes per pool")
+    parser.add_argument("--align", type=int, default=8, help="Block size and class alignment in bytes")
+    parser.add_argument("--max-candidates", type=int, default=24,
+                        help="Maximum number of distinct block sizes considered per pool")
+    parser.add_argument("--map", action="append", default=[], metavar="POOL=ROLE",
+                        help="Name a pool by base address, ROLE is KERNEL or USER (emits linker size)")
+    parser.add_argument("--output", type=str, help="Also write the result to this file")
+    args = parser.parse_args()
+
+    if args.max_candidates < 2:
+        parser.error("--max-candidates must be at least 2")
+
+    try:
+        roles = parse_roles(args.map)
+    except ValueError as e:
+        parser.error(str(e))
+
+    optimizer = PoolLayoutOptimizer(args.max_classes, args.align, args.max_candidates)
+    for trace in args.traces:
+        optimizer.load(Path(trace))
+
+    lines, ok = optimizer.run(roles)
+    text = "\n".join(lines)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if not ok:
+        print("Warning: trace contains failed allocations, result is a lower bound", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
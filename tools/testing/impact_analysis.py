@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+impact_analysis.py
+
+Selects the translation units, CMake targets and os_tests suites affected by a
+set of changed files, so CI only rebuilds and re-tests what a change can reach.
+
+The dependency graph comes from compile_commands.json (which TUs exist and
+where their objects go) and the GCC depfiles (<object>.d) that CMake writes
+next to every object. It is persisted in <build>/impact_graph.json and only the
+depfiles whose mtime changed, or whose compile_commands.json entry changed, are
+re-parsed on the next query. The target link map is rebuilt from link.txt files
+only when the build tree layout or one of those files changed.
+
+Rules:
+    - A changed file affects every TU that is it or lists it in its depfile.
+    - A TU without a depfile (never built) is treated as affected by any change.
+    - A TU's CMake target is taken from its object path (CMakeFiles/<target>.dir/);
+      targets whose link.txt pulls in those objects are affected too.
+    - TUs of the os_tests host build map to their suite (os_tests/src/<suite>/).
+    - CMake scripts and templates (CMakeLists.txt, *.cmake, *.in) force a full run,
+      linker scripts (*.ld) relink every target without recompiling.
+    - Sources are collected by glob, so a source file that is not in the compile
+      database (added or deleted) forces a full run; a header that no depfile
+      lists is reported as unknown.
+
+Usage:
+    python tools/testing/impact_analysis.py --base origin/master
+    python tools/testing/impact_analysis.py --files os_kernel/include/policy/task/task_lists.hpp
+    git diff --name-only HEAD~1 | python tools/testing/impact_analysis.py --stdin --json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+FULL_RUN_NAMES = {"CMakeLists.txt"}
+FULL_RUN_SUFFIXES = {".cmake", ".in"}
+RELINK_SUFFIXES = {".ld"}
+SOURCE_SUFFIXES = {".c", ".cc", ".cpp", ".cxx", ".s", ".S"}
+HEADER_SUFFIXES = {".h", ".hh", ".hpp", ".hxx", ".ipp", ".inl", ".tpp"}
+TARGET_DIR = re.compile(r"CMakeFiles/([^/]+)\.dir/")
+
+
+def normalize_path(path: str) -> str:
+    """Convert backslashes to forward slashes and remove trailing slash (except root)."""
+    path = path.replace("\\", "/")
+    if path.endswith("/") and not path == "/":
+        path = path.rstrip("/")
+    return path
+
+
+def resolve(path: str, base: str) -> str:
+    p = Path(path)
+    if not p.is_absolute():
+        p = Path(base) / p
+    return normalize_path(os.path.normpath(str(p)))
+
+
+class ImpactGraph:
+    """Persisted TU -> dependency graph of one or more CMake build trees."""
+
+    GRAPH_VERSION = 2
+
+    def __init__(self, project_root: Path, build_dirs: List[Path], graph_path: Path) -> None:
+        self.project_root = normalize_path(str(project_root.resolve()))
+        self.build_dirs = [b.resolve() for b in build_dirs]
+        self.graph_path = graph_path
+        self.paths: List[str] = []
+        self.path_ids: Dict[str, int] = {}
+        # tu path -> {"build": str, "directory": str, "object": str, "target": str, "entry": str,
+        #             "depfile": str, "mtime": int, "deps": [ids]}
+        self.units: Dict[str, Dict[str, Any]] = {}
+        # build dir -> {"db_mtime": int, "links": {target: [object targets]},
+        #               "link_files": {link.txt: mtime}, "link_dirs": {CMakeFiles dir: mtime}}
+        self.builds: Dict[str, Dict[str, Any]] = {}
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+    def load(self) -> None:
+        if not self.graph_path.is_file():
+            return
+        try:
+            with open(self.graph_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") != self.GRAPH_VERSION:
+            return
+        self.paths = data["paths"]
+        self.path_ids = {p: i for i, p in enumerate(self.paths)}
+        self.units = data["units"]
+        self.builds = data["builds"]
+
+    def save(self) -> None:
+        self.graph_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.graph_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": self.GRAPH_VERSION,
+                "paths": self.paths,
+                "units": self.units,
+                "builds": self.builds,
+            }, f, separators=(",", ":"))
+        os.replace(temp_path, self.graph_path)
+
+    def intern(self, path: str) -> int:
+        index = self.path_ids.get(path)
+        if index is None:
+            index = len(self.paths)
+            self.paths.append(path)
+            self.path_ids[path] = index
+        return index
+
+    # -------------------------------------------------------------------------
+    # Incremental update
+    # -------------------------------------------------------------------------
+    def update(self) -> int:
+        """Refresh changed databases and depfiles; return the number of re-parsed depfiles."""
+        live_units: Set[str] = set()
+        reparsed = 0
+        for build_dir in self.build_dirs:
+            build_key = normalize_path(str(build_dir))
+            db_path = build_dir / "compile_commands.json"
+            if not db_path.is_file():
+                self.builds.pop(build_key, None)
+                continue
+            state = self.builds.setdefault(build_key, {})
+            for key, default in (("db_mtime", 0), ("links", {}), ("link_files", {}), ("link_dirs", {})):
+                state.setdefault(key, default)
+            db_mtime = db_path.stat().st_mtime_ns
+            db_changed = db_mtime != state["db_mtime"]
+            if db_changed:
+                self._load_database(build_key, db_path)
+                state["db_mtime"] = db_mtime
+            self._refresh_links(build_dir, state, rescan=db_changed)
+            for tu, unit in self.units.items():
+                if unit["build"] != build_key:
+                    continue
+                live_units.add(tu)
+                if self._refresh_depfile(unit):
+                    reparsed += 1
+
+        for stale in set(self.units) - live_units:
+            del self.units[stale]
+        return reparsed
+
+    def _load_database(self, build_key: str, db_path: Path) -> None:
+        """Re-read the compile database, keeping parsed depfiles of unchanged entries."""
+        with open(db_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        previous = {t: u for t, u in self.units.items() if u["build"] == build_key}
+        for tu in previous:
+            del self.units[tu]
+        for entry in entries:
+            directory = entry.get("directory", build_key)
+            file_field = entry.get("file")
+            if not file_field:
+                continue
+            output = entry.get("output") or self._output_from_command(entry)
+            if not output:
+                continue
+            tu = resolve(file_field, directory)
+            obj = resolve(output, directory)
+            entry_hash = hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+            old = previous.get(tu)
+            if old is not None and old.get("entry") == entry_hash:
+                self.units[tu] = old
+                continue
+            match = TARGET_DIR.search(obj)
+            self.units[tu] = {
+                "build": build_key,
+                "directory": normalize_path(directory),
+                "object": obj,
+                "target": match.group(1) if match else "",
+                "entry": entry_hash,
+                "depfile": obj + ".d",
+                "mtime": 0,
+                "deps": None,
+            }
+
+    @staticmethod
+    def _output_from_command(entry: Dict[str, Any]) -> Optional[str]:
+        args = entry.get("arguments") or shlex.split(entry.get("command", ""), posix=(os.name != "nt"))
+        for i, arg in enumerate(args[:-1]):
+            if arg == "-o":
+                return args[i + 1]
+        return None
+
+    def _refresh_depfile(self, unit: Dict[str, Any]) -> bool:
+        try:
+            mtime = os.stat(unit["depfile"]).st_mtime_ns
+        except OSError:
+            unit["mtime"] = 0
+            unit["deps"] = None
+            return False
+        if mtime == unit["mtime"] and unit["deps"] is not None:
+            return False
+        deps = self._parse_depfile(Path(unit["depfile"]), unit["directory"])
+        unit["deps"] = sorted({self.intern(p) for p in deps})
+        unit["mtime"] = mtime
+        return True
+
+    @staticmethod
+    def _parse_depfile(depfile: Path, base: str) -> List[str]:
+        """
+        Parse a GCC Make-syntax depfile; returns the prerequisites of all rules.
+        Relative paths are relative to the compiler's working directory (`base`).
+        """
+        text = depfile.read_text(encoding="utf-8", errors="replace").replace("\\\r\n", " ").replace("\\\n", " ")
+        deps: List[str] = []
+        for line in text.splitlines():
+            # Split "target: prerequisites" at the first ': ' (drive letters use ':\\' or ':/')
+            # Lines without one are -MP phony rules ("header.hpp:") and are skipped.
+            _, sep, rest = line.partition(": ")
+            if not sep:
+                continue
+            for token in re.findall(r"(?:\\ |[^\s])+", rest):
+                deps.append(resolve(token.replace("\\ ", " "), base))
+        return deps
+
+    @staticmethod
+    def _mtime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _refresh_links(self, build_dir: Path, state: Dict[str, Any], rescan: bool) -> None:
+        """
+        Keep the map of linked targets to the object-owning targets their link.txt
+        references. The build tree is only walked again when the compile database
+        or one of the CMakeFiles directories changed since the last walk; otherwise
+        only link.txt files whose mtime changed are re-read.
+        """
+        rescan = rescan or not state["link_dirs"] or any(
+            self._mtime(d) != mtime for d, mtime in state["link_dirs"].items())
+        if rescan:
+            cmake_dirs = self._own_cmake_dirs(build_dir)
+            link_files = [normalize_path(str(p)) for d in cmake_dirs for p in d.glob("*.dir/link.txt")]
+            live_targets = {Path(f).parent.name[:-len(".dir")] for f in link_files}
+            state["link_dirs"] = {normalize_path(str(d)): self._mtime(str(d)) for d in cmake_dirs}
+            # Keep known mtimes so unchanged link.txt files are not re-read
+            state["link_files"] = {f: state["link_files"].get(f, 0) for f in link_files}
+            state["links"] = {t: o for t, o in state["links"].items() if t in live_targets}
+
+        for link_txt, known_mtime in list(state["link_files"].items()):
+            mtime = self._mtime(link_txt)
+            if mtime == known_mtime:
+                continue
+            target = Path(link_txt).parent.name[:-len(".dir")]
+            if mtime == 0:
+                del state["link_files"][link_txt]
+                state["links"].pop(target, None)
+                continue
+            text = Path(link_txt).read_text(encoding="utf-8", errors="replace")
+            state["links"][target] = sorted({m.group(1) for m in TARGET_DIR.finditer(text.replace("\\", "/"))}
+                                            - {target})
+            state["link_files"][link_txt] = mtime
+
+    @staticmethod
+    def _own_cmake_dirs(build_dir: Path) -> List[Path]:
+        """CMakeFiles directories of this build tree, skipping nested trees (build/os_tests, build/matrix/*)."""
+        found: List[Path] = []
+        for root, dirs, _ in os.walk(build_dir):
+            if "CMakeFiles" in dirs:
+                found.append(Path(root) / "CMakeFiles")
+            # Do not descend into CMakeFiles itself or into another tree with its own cache
+            dirs[:] = [d for d in dirs if d != "CMakeFiles"
+                       and not os.path.isfile(os.path.join(root, d, "CMakeCache.txt"))]
+        return found
+
+    # -------------------------------------------------------------------------
+    # Query
+    # -------------------------------------------------------------------------
+    def affected(self, changed_files: List[str]) -> Dict[str, Any]:
+        changed = {resolve(f, self.project_root) for f in changed_files}
+        full_run = any(Path(f).name in FULL_RUN_NAMES or Path(f).suffix in FULL_RUN_SUFFIXES for f in changed)
+        relink = any(Path(f).suffix in RELINK_SUFFIXES for f in changed)
+
+        # Files the graph has never seen: new or deleted sources change the globbed source
+        # lists without touching any CMakeLists.txt, so only a full run is safe
+        unknown_files = sorted(f for f in changed
+                               if Path(f).suffix in SOURCE_SUFFIXES | HEADER_SUFFIXES
+                               and f not in self.units and f not in self.path_ids)
+        full_run = full_run or any(Path(f).suffix in SOURCE_SUFFIXES for f in unknown_files)
+
+        changed_ids = {self.path_ids[f] for f in changed if f in self.path_ids}
+        units: Set[str] = set()
+        unknown: Set[str] = set()
+        for tu, unit in self.units.items():
+            if full_run or tu in changed:
+                units.add(tu)
+            elif unit["deps"] is None:
+                if changed:
+                    units.add(tu)
+                    unknown.add(tu)
+            elif changed_ids.intersection(unit["deps"]):
+                units.add(tu)
+
+        targets: Set[str] = {self.units[tu]["target"] for tu in units if self.units[tu]["target"]}
+        for state in self.builds.values():
+            for linked, owners in state["links"].items():
+                if full_run or relink or linked in targets or targets.intersection(owners):
+                    targets.add(linked)
+
+        # A test binary is affected when its target is; its suite is the directory of its sources
+        test_suites = self._test_suites()
+        test_binaries = sorted(t for t in targets if t in test_suites)
+
+        return {
+            "full_rebuild": full_run,
+            "relink_only": relink and not full_run,
+            "translation_units": sorted(units),
+            "unknown_dependencies": sorted(unknown),
+            "unknown_files": unknown_files,
+            "targets": sorted(targets),
+            "test_suites": sorted({test_suites[t] for t in test_binaries}),
+            "test_binaries": test_binaries,
+        }
+
+    def _test_suites(self) -> Dict[str, str]:
+        """Map os_tests targets to their suite (os_tests/src/<suite>/...)."""
+        tests_prefix = f"{self.project_root}/os_tests/src/"
+        suites: Dict[str, str] = {}
+        for tu, unit in self.units.items():
+            rel = tu[len(tests_prefix):] if tu.startswith(tests_prefix) else ""
+            if "/" in rel and unit["target"]:
+                suites[unit["target"]] = rel.split("/", 1)[0]
+        return suites
+
+
+# -----------------------------------------------------------------------------
+# Changed file sources
+# -----------------------------------------------------------------------------
+def git_changed_files(project_root: Path, base: str, include_worktree: bool) -> List[str]:
+    cmd = ["git", "-C", str(project_root), "diff", "--name-only", f"{base}...HEAD"]
+    files = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True).stdout.splitlines()
+    if include_worktree:
+        cmd = ["git", "-C", str(project_root), "diff", "--name-only", "HEAD"]
+        files += subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True).stdout.splitlines()
+    return sorted({f for f in files if f})
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[2]
+
+    parser = argparse.ArgumentParser(description="Select TUs, targets and test suites affected by a change")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--base", type=str, help="Git ref to diff against (uses BASE...HEAD)")
+    source.add_argument("--files", nargs="+", help="Changed files, relative to the project root")
+    source.add_argument("--stdin", action="store_true", help="Read changed files from stdin, one per line")
+    parser.add_argument("--worktree", action="store_true", help="With --base, also include uncommitted changes")
+    parser.add_argument("--build-dir", action="append", default=None,
+                        help="Build tree(s) to analyse (default: build and build/os_tests)")
+    parser.add_argument("--graph", type=str, default=str(project_root / "build" / "impact_graph.json"),
+                        help="Persisted dependency graph")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    if args.base:
+        changed = git_changed_files(project_root, args.base, args.worktree)
+    elif args.files:
+        changed = args.files
+    else:
+        changed = [line.strip() for line in sys.stdin if line.strip()]
+
+    build_dirs = [Path(b) for b in args.build_dir] if args.build_dir else [
+        project_root / "build",
+        project_root / "build" / "os_tests",
+    ]
+
+    graph = ImpactGraph(project_root, build_dirs, Path(args.graph))
+    graph.load()
+    reparsed = graph.update()
+    graph.save()
+    result = graph.affected(changed)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"{len(changed)} changed files, {reparsed} depfiles re-parsed")
+    if result["full_rebuild"]:
+        print("Build system or unindexed source files changed: full rebuild and test run required")
+    if result["unknown_files"]:
+        print(f"{len(result['unknown_files'])} changed files are not in the dependency graph:")
+        for item in result["unknown_files"]:
+            print(f"  {item}")
+    for key in ("translation_units", "targets", "test_suites"):
+        print(f"{key.replace('_', ' ')} ({len(result[key])}):")
+        for item in result[key]:
+            print(f"  {item}")
+    if result["unknown_dependencies"]:
+        print(f"{len(result['unknown_dependencies'])} TUs have no depfile yet and were included conservatively")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
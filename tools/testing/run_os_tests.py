@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+run_os_tests.py
+
+Builds the host-side os_tests binaries, discovers their doctest cases and runs
+them in parallel, optionally split into shards for CI.
+
+Every test case runs in its own process so that per-test timings are exact and
+a crash only affects one case. Passing results are cached, keyed on the hash of
+the test binary, its manifest entry and declared input files, the case name and
+the runner arguments, so unchanged tests are skipped on the next run. Results
+are written as JSON and JUnit XML.
+
+Shards are assigned from inputs every CI machine shares: the sorted case list
+and, if given, a timing file (--timings). Without one, cases are spread by a
+stable hash of their id.
+
+Usage:
+    python tools/testing/run_os_tests.py [--jobs N] [--shard-index I --shard-count N]
+                                         [--timings PATH] [--no-build] [--no-cache]
+                                         [--json PATH] [--junit PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# "[doctest] test cases: 1 | 1 passed | 0 failed | 2 skipped"
+TEST_CASE_SUMMARY = re.compile(r"test cases:\s*(\d+)\s*\|")
+
+
+class TestCase:
+    """A single doctest case inside one test binary."""
+
+    def __init__(self, suite: str, binary: Path, binary_hash: str, name: str,
+                 inputs_hash: str = "") -> None:
+        self.suite = suite
+        self.binary = binary
+        self.binary_hash = binary_hash
+        self.name = name
+        self.inputs_hash = inputs_hash   # manifest entry + declared input files
+
+    @property
+    def test_id(self) -> str:
+        return f"{self.suite}/{self.binary.name}::{self.name}"
+
+
+class TestResult:
+    """Outcome of one test case."""
+
+    def __init__(self, case: TestCase, status: str, duration: float, output: str = "") -> None:
+        self.case = case
+        self.status = status          # "passed" | "failed" | "cached"
+        self.duration = duration
+        self.output = output
+
+
+class OsTestRunner:
+    """Configure, build, discover, shard, run and report the os_tests suites."""
+
+    CACHE_VERSION = 2
+    DEFAULT_DURATION = 1.0
+
+    def __init__(self, project_root: Path, build_dir: Path, jobs: int,
+                 shard_index: int = 0, shard_count: int = 1,
+                 timeout: float = 300.0, use_cache: bool = True,
+                 extra_args: Optional[List[str]] = None,
+                 timings_path: Optional[Path] = None) -> None:
+        self.project_root = project_root
+        self.source_dir = project_root / "os_tests"
+        self.build_dir = build_dir
+        self.jobs = max(1, jobs)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self.extra_args = extra_args or []
+        self.timings_path = timings_path
+        self.manifest_path = self.build_dir / "os_tests_manifest.json"
+        self.cache_path = self.build_dir / "os_tests_cache.json"
+        self.cache: Dict[str, Any] = {}
+
+    # -------------------------------------------------------------------------
+    # Public entry point
+    # -------------------------------------------------------------------------
+    def run(self, build: bool = True, json_path: Optional[Path] = None,
+            junit_path: Optional[Path] = None) -> int:
+        if build:
+            self.configure_and_build()
+        self.load_cache()
+
+        cases = self.discover_cases()
+        selected = self.select_shard(cases)
+        print(f"Discovered {len(cases)} test cases, "
+              f"shard {self.shard_index + 1}/{self.shard_count} runs {len(selected)}")
+
+        start = time.perf_counter()
+        results = self.run_cases(selected)
+        wall_time = time.perf_counter() - start
+
+        self.update_cache(results)
+        self.save_cache()
+
+        if json_path is not None:
+            self.write_json(results, json_path, wall_time)
+        if junit_path is not None:
+            self.write_junit(results, junit_path, wall_time)
+
+        return self.print_summary(results, wall_time)
+
+    # -------------------------------------------------------------------------
+    # Build
+    # -------------------------------------------------------------------------
+    def configure_and_build(self) -> None:
+        """Configure the host test project (first run only) and build it."""
+        if not (self.build_dir / "CMakeCache.txt").is_file():
+            self._check_call(["cmake", "-S", str(self.source_dir), "-B", str(self.build_dir)])
+        self._check_call(["cmake", "--build", str(self.build_dir), "--parallel", str(self.jobs)])
+
+    @staticmethod
+    def _check_call(cmd: List[str]) -> None:
+        print(" ".join(cmd))
+        try:
+            subprocess.run(cmd, check=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Command failed with exit code {e.returncode}: {' '.join(cmd)}") from e
+
+    # -------------------------------------------------------------------------
+    # Cache handling
+    # -------------------------------------------------------------------------
+    def load_cache(self) -> None:
+        self.cache = {"version": self.CACHE_VERSION, "passed": {}, "cases": {}}
+        if not self.cache_path.is_file():
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Ignoring unreadable test cache {self.cache_path}: {e}", file=sys.stderr)
+            return
+        if data.get("version") == self.CACHE_VERSION:
+            self.cache.update(data)
+
+    def save_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.cache_path)
+
+    def cache_key(self, case: TestCase) -> str:
+        """Key a result on the binary and input contents, the case name and the runner arguments."""
+        h = hashlib.sha256()
+        for part in (case.binary_hash, case.inputs_hash, case.name, json.dumps(self.extra_args)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def update_cache(self, results: List[TestResult]) -> None:
+        passed = self.cache["passed"]
+        for result in results:
+            key = self.cache_key(result.case)
+            if result.status == "passed":
+                passed[key] = result.duration
+            elif result.status == "failed":
+                passed.pop(key, None)
+
+    @staticmethod
+    def hash_file(path: Path) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def hash_inputs(self, entry: Dict[str, Any]) -> str:
+        """Hash a manifest entry together with the contents of its declared inputs."""
+        h = hashlib.sha256()
+        h.update(json.dumps(entry, sort_keys=True).encode("utf-8"))
+        for name in sorted(entry.get("inputs", [])):
+            path = Path(name)
+            if not path.is_absolute():
+                path = self.source_dir / path
+            h.update(b"\0" + str(path).encode("utf-8") + b"\0")
+            # A missing input still yields a distinct key, the test itself reports the error
+            h.update(self.hash_file(path).encode("ascii") if path.is_file() else b"<missing>")
+        return h.hexdigest()
+
+    # -------------------------------------------------------------------------
+    # Discovery
+    # -------------------------------------------------------------------------
+    def load_manifest(self) -> List[Dict[str, Any]]:
+        if not self.manifest_path.is_file():
+            raise FileNotFoundError(f"Test manifest not found: {self.manifest_path} (build the tests first)")
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"Expected {self.manifest_path} to contain a JSON array.")
+        return data
+
+    def discover_cases(self) -> List[TestCase]:
+        """List the cases of every binary; listings are cached per binary hash."""
+        cases: List[TestCase] = []
+        known_cases = self.cache["cases"]
+        live_hashes = set()
+        for entry in self.load_manifest():
+            binary = Path(entry["binary"])
+            if not binary.is_file():
+                raise FileNotFoundError(f"Test binary not found: {binary}")
+            binary_hash = self.hash_file(binary)
+            inputs_hash = self.hash_inputs(entry)
+            live_hashes.add(binary_hash)
+            names = known_cases.get(binary_hash)
+            if names is None:
+                names = self.list_test_cases(binary)
+                known_cases[binary_hash] = names
+            for name in names:
+                cases.append(TestCase(entry["suite"], binary, binary_hash, name, inputs_hash))
+        # Drop listings of binaries that no longer exist
+        for stale in set(known_cases) - live_hashes:
+            del known_cases[stale]
+        return cases
+
+    def list_test_cases(self, binary: Path) -> List[str]:
+        result = subprocess.run(
+            [str(binary), "--list-test-cases", "--no-version", "--no-colors"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+            timeout=self.timeout,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Failed to list test cases of {binary}: {result.stderr}")
+
+        # Case names are printed between two separator lines
+        names: List[str] = []
+        in_section = False
+        for line in result.stdout.splitlines():
+            if line.startswith("====="):
+                if in_section:
+                    break
+                in_section = True
+                continue
+            if in_section and line.strip():
+                names.append(line.rstrip())
+        return names
+
+    # -------------------------------------------------------------------------
+    # Sharding
+    # -------------------------------------------------------------------------
+    def load_timings(self) -> Dict[str, float]:
+        """
+        Read the shared timing file: either a {test_id: seconds} map or a JSON
+        report written by --json (possibly merged from several shards).
+        """
+        assert self.timings_path is not None
+        with open(self.timings_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("tests"), list):
+            return {t["id"]: float(t["duration"]) for t in data["tests"] if t.get("status") != "cached"}
+        if isinstance(data, dict):
+            return {str(k): float(v) for k, v in data.items()}
+        raise ValueError(f"Expected {self.timings_path} to contain a timing map or a JSON report.")
+
+    @staticmethod
+    def stable_shard(test_id: str, shard_count: int) -> int:
+        digest = hashlib.sha256(test_id.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % shard_count
+
+    def select_shard(self, cases: List[TestCase]) -> List[TestCase]:
+        """
+        Pick this shard's cases. The split must not depend on anything local to
+        one machine (such as the per-build-dir cache), so with --timings cases
+        are balanced by the shared durations (longest first, each to the least
+        loaded shard), and without it they are spread by a hash of the case id.
+        """
+        if self.shard_count <= 1:
+            return cases
+        if self.timings_path is None:
+            return [c for c in cases if self.stable_shard(c.test_id, self.shard_count) == self.shard_index]
+
+        timings = self.load_timings()
+        ordered = sorted(cases, key=lambda c: (-timings.get(c.test_id, self.DEFAULT_DURATION), c.test_id))
+        loads = [0.0] * self.shard_count
+        selected: List[TestCase] = []
+        for case in ordered:
+            shard = min(range(self.shard_count), key=lambda i: (loads[i], i))
+            loads[shard] += timings.get(case.test_id, self.DEFAULT_DURATION)
+            if shard == self.shard_index:
+                selected.append(case)
+        return selected
+
+    # -------------------------------------------------------------------------
+    # Execution
+    # -------------------------------------------------------------------------
+    def run_cases(self, cases: List[TestCase]) -> List[TestResult]:
+        results: List[TestResult] = []
+        pending: List[TestCase] = []
+        passed = self.cache["passed"]
+        for case in cases:
+            key = self.cache_key(case)
+            if self.use_cache and key in passed:
+                results.append(TestResult(case, "cached", passed[key]))
+            else:
+                pending.append(case)
+
+        # Each case runs in its own child process; threads only wait on them
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for result in pool.map(self.run_case, pending):
+                mark = "PASS" if result.status == "passed" else "FAIL"
+                print(f"[{mark}] {result.case.test_id} ({result.duration:.3f}s)")
+                results.append(result)
+        return results
+
+    def run_case(self, case: TestCase) -> TestResult:
+        # doctest filters are wildcard patterns: '*' and '?' cannot be escaped, so such names
+        # could select other cases and are rejected; ',' and '\\' are escaped
+        if any(c in case.name for c in "*?"):
+            return TestResult(case, "failed", 0.0,
+                              "Test case names containing '*' or '?' cannot be selected individually; "
+                              "rename the case")
+        case_filter = case.name.replace("\\", "\\\\").replace(",", "\\,")
+        # -cs: the filter is case-insensitive by default, so 'alpha' would also run 'Alpha'
+        cmd = [str(case.binary), f"--test-case={case_filter}", "-cs", "--no-version", "--no-colors"]
+        cmd.extend(self.extra_args)
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                check=False,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired as e:
+            output = e.stdout if isinstance(e.stdout, str) else ""
+            return TestResult(case, "failed", time.perf_counter() - start,
+                              f"{output}\nTimed out after {self.timeout}s")
+        duration = time.perf_counter() - start
+        if result.returncode != 0:
+            return TestResult(case, "failed", duration, result.stdout)
+        # A filter that matched nothing (or more than this case) exits 0 as well
+        match = TEST_CASE_SUMMARY.search(result.stdout)
+        if match is None or int(match.group(1)) != 1:
+            ran = match.group(1) if match else "an unknown number of"
+            return TestResult(case, "failed", duration,
+                              f"{result.stdout}\nExpected the filter to run exactly 1 test case, it ran {ran}")
+        return TestResult(case, "passed", duration, result.stdout)
+
+    # -------------------------------------------------------------------------
+    # Reports
+    # -------------------------------------------------------------------------
+    def write_json(self, results: List[TestResult], path: Path, wall_time: float) -> None:
+        report = {
+            "shard_index": self.shard_index,
+            "shard_count": self.shard_count,
+            "wall_time": wall_time,
+            "tests": [
+                {
+                    "id": r.case.test_id,
+                    "suite": r.case.suite,
+                    "binary": str(r.case.binary),
+                    "name": r.case.name,
+                    "status": r.status,
+                    "duration": r.duration,
+                }
+                for r in results
+            ],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON report written to {path}")
+
+    def write_junit(self, results: List[TestResult], path: Path, wall_time: float) -> None:
+        suites: Dict[str, List[TestResult]] = {}
+        for r in results:
+            suites.setdefault(r.case.suite, []).append(r)
+
+        root = ET.Element("testsuites", {
+            "name": "os_tests",
+            "tests": str(len(results)),
+            "failures": str(sum(r.status == "failed" for r in results)),
+            "skipped": str(sum(r.status == "cached" for r in results)),
+            "time": f"{wall_time:.3f}",
+        })
+        for suite_name, suite_results in sorted(suites.items()):
+            suite = ET.SubElement(root, "testsuite", {
+                "name": suite_name,
+                "tests": str(len(suite_results)),
+                "failures": str(sum(r.status == "failed" for r in suite_results)),
+                "skipped": str(sum(r.status == "cached" for r in suite_results)),
+                "time": f"{sum(r.duration for r in suite_results if r.status != 'cached'):.3f}",
+            })
+            for r in suite_results:
+                case = ET.SubElement(suite, "testcase", {
+                    "classname": f"{suite_name}.{r.case.binary.name}",
+                    "name": r.case.name,
+                    "time": f"{r.duration:.3f}" if r.status != "cached" else "0",
+                })
+                if r.status == "failed":
+                    failure = ET.SubElement(case, "failure", {"message": "test case failed"})
+                    failure.text = r.output
+                elif r.status == "cached":
+                    ET.SubElement(case, "skipped", {"message": "cached pass, binary unchanged"})
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+        print(f"JUnit report written to {path}")
+
+    @staticmethod
+    def print_summary(results: List[TestResult], wall_time: float) -> int:
+        failed = [r for r in results if r.status == "failed"]
+        cached = sum(r.status == "cached" for r in results)
+        for r in failed:
+            print(f"\n===== FAILED: {r.case.test_id} =====\n{r.output}", file=sys.stderr)
+        print(f"{len(results)} tests: {len(results) - len(failed) - cached} passed, "
+              f"{cached} cached, {len(failed)} failed in {wall_time:.2f}s")
+        return 1 if failed else 0
+
+
+# -----------------------------------------------------------------------------
+# Main entry point
+# -----------------------------------------------------------------------------
+def main() -> int:
+    project_root = Path(__file__).resolve().parents[2]
+
+    parser = argparse.ArgumentParser(description="Parallel, sharded, cached runner for os_tests")
+    parser.add_argument("--build-dir", type=str, default=str(project_root / "build" / "os_tests"),
+                        help="Host build directory for os_tests (default: build/os_tests)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Number of test processes to run concurrently")
+    parser.add_argument("--shard-index", type=int, default=0, help="Index of this shard (0-based)")
+    parser.add_argument("--shard-count", type=int, default=1, help="Total number of shards")
+    parser.add_argument("--timings", type=str,
+                        help="Shared timing file used to balance shards (a JSON report or {id: seconds})")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-test timeout in seconds")
+    parser.add_argument("--no-build", action="store_true", help="Skip configure/build, use existing binaries")
+    parser.add_argument("--no-cache", action="store_true", help="Run every test even if a cached pass exists")
+    parser.add_argument("--json", type=str, help="Write a JSON report to this path")
+    parser.add_argument("--junit", type=str, help="Write a JUnit XML report to this path")
+    parser.add_argument("doctest_args", nargs="*",
+                        help="Extra arguments passed to every test binary (after '--')")
+    args = parser.parse_args()
+
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be in [0, --shard-count)")
+
+    runner = OsTestRunner(
+        project_root=project_root,
+        build_dir=Path(args.build_dir),
+        jobs=args.jobs,
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+        timeout=args.timeout,
+        use_cache=not args.no_cache,
+        extra_args=args.doctest_args,
+        timings_path=Path(args.timings) if args.timings else None,
+    )
+    return runner.run(
+        build=not args.no_build,
+        json_path=Path(args.json) if args.json else None,
+        junit_path=Path(args.junit) if args.junit else None,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())